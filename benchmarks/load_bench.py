@@ -0,0 +1,251 @@
+"""Load benchmark for the auth and blog endpoints through an in-process ASGI client.
+
+Seeds a throwaway SQLite database (or the database of an existing .env with
+--env-file) with synthetic users and posts, then drives each scenario at a fixed
+concurrency:
+
+    python benchmarks/load_bench.py --posts 100000 --concurrency 32 --sql-counts --out before.json
+
+Prints throughput, latency percentiles, bytes on the wire and process CPU time per
+request as JSON so runs can be diffed between commits. Compare response encodings with
+e.g. --accept-encoding identity / gzip / br; CPU time is the whole process, client included.
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+SCENARIOS = ("token", "me", "all_blogs", "blog", "create", "edit")
+PASSWORD = "bench-password"
+
+
+def percentiles(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1000  # noqa: E731
+    return {
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def prepare_workdir(args) -> Path:
+    """Points the app's settings at the generated (or given) .env via ENV_FILE."""
+    if args.env_file:
+        workdir = Path(args.env_file).resolve().parent
+    else:
+        workdir = Path(args.workdir or tempfile.mkdtemp(prefix="blog-bench-"))
+        workdir.mkdir(parents=True, exist_ok=True)
+        (workdir / ".env").write_text("\n".join([
+            f"DB_CONNECTION=sqlite:///{workdir / 'bench.db'}",
+            "SECRET_KEY=bench-secret",
+            "ALGORITHM=HS256",
+            "SMTP_HOST=localhost",
+            "SMTP_PORT=2525",
+            "SMTP_USER=",
+            "SMTP_PASSWORD=",
+            "SMTP_FROM=bench@example.com",
+            "SMTP_STARTTLS=false",
+            f"BCRYPT_ROUNDS={args.bcrypt_rounds}",
+            "RATE_LIMIT_ENABLED=false",
+            f"DB_ASYNC={'true' if args.db_async else 'false'}",
+        ]) + "\n")
+    os.environ["ENV_FILE"] = str(workdir / ".env")
+    # Relative sqlite:/// paths in a given .env resolve against its directory.
+    os.chdir(workdir)
+    return workdir
+
+
+def seed(args) -> None:
+    from sqlalchemy import func, insert, select
+
+    from database import Base, get_engine
+    from models import Blogs, Users
+    from security import hash_password
+
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        users = conn.scalar(select(func.count(Users.id)))
+        posts = conn.scalar(select(func.count(Blogs.id)))
+    # Earlier "create" runs add posts on top of the seeded ones; the seeded ids are unchanged.
+    if users == args.users and posts >= args.posts:
+        return
+    if users or posts:
+        raise SystemExit(f"Database already holds {users} users and {posts} posts; use a fresh --workdir")
+
+    password_hash = hash_password(PASSWORD)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(Users), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": password_hash, "role": "user"}
+            for i in range(1, args.users + 1)
+        ])
+        batch = []
+        for i in range(1, args.posts + 1):
+            # Post i belongs to user ((i - 1) % users) + 1, so owners are known without a lookup.
+            batch.append({"id": i, "title": f"Post {i}", "description": f"Synthetic body {i} " * 20, "author_id": (i - 1) % args.users + 1})
+            if len(batch) == 10000:
+                conn.execute(insert(Blogs), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Blogs), batch)
+    print(f"seeded {args.users} users / {args.posts} posts in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+def make_requests(args, scenario: str, rng: random.Random):
+    from security import create_access_token
+
+    sample_users = rng.sample(range(1, args.users + 1), min(args.users, 200))
+    tokens = {u: create_access_token(f"user{u}", u, "user") for u in sample_users}
+    counter = itertools.count()
+
+    def auth(user_id):
+        return {"Authorization": f"Bearer {tokens[user_id]}"}
+
+    def build():
+        user_id = rng.choice(sample_users)
+        if scenario == "token":
+            return "POST", "/auth/token", {"data": {"username": f"user{user_id}", "password": PASSWORD}}
+        if scenario == "me":
+            return "GET", "/auth/me", {"headers": auth(user_id)}
+        if scenario == "all_blogs":
+            return "GET", "/blogs/all_blogs?limit=20", {"headers": auth(user_id)}
+        if scenario == "blog":
+            return "GET", f"/blogs/{rng.choice(range(user_id, args.posts + 1, args.users))}", {"headers": auth(user_id)}
+        if scenario == "create":
+            return "POST", "/blogs/create", {"headers": auth(user_id), "json": {"title": f"bench {time.time_ns()} {next(counter)}", "description": "Created by the load benchmark."}}
+        owned = range(user_id, args.posts + 1, args.users)
+        return "PATCH", f"/blogs/edit/{rng.choice(owned)}", {"headers": auth(user_id), "json": {"description": f"Edited {next(counter)}"}}
+
+    return build
+
+
+async def run_scenario(client, args, scenario: str) -> dict:
+    from database import count_queries
+
+    rng = random.Random(args.seed)
+    build = make_requests(args, scenario, rng)
+    remaining = itertools.count()
+    samples, statuses, wire_bytes = [], collections.Counter(), 0
+
+    for _ in range(args.warmup):
+        method, url, kwargs = build()
+        await client.request(method, url, **kwargs)
+
+    async def worker():
+        nonlocal wire_bytes
+        while next(remaining) < args.requests:
+            method, url, kwargs = build()
+            t0 = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            samples.append(time.perf_counter() - t0)
+            statuses[str(response.status_code)] += 1
+            # Body bytes as sent, before httpx decodes any Content-Encoding.
+            wire_bytes += response.num_bytes_downloaded
+
+    with count_queries() as statements:
+        started, cpu_started = time.perf_counter(), time.process_time()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    result = {
+        "scenario": scenario,
+        "requests": len(samples),
+        "errors": sum(n for code, n in statuses.items() if int(code) >= 400),
+        "statuses": dict(sorted(statuses.items())),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(samples) / elapsed, 1),
+        **percentiles(samples),
+        "bytes_per_response": round(wire_bytes / len(samples)),
+        "cpu_ms_per_request": round(cpu / len(samples) * 1000, 3),
+    }
+    if args.sql_counts:
+        result["sql_per_request"] = round(len(statements) / len(samples), 2)
+    return result
+
+
+async def run(args) -> list[dict]:
+    import httpx
+
+    from database import dispose_engines
+    from main import app
+
+    results = []
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            headers = {"Accept-Encoding": args.accept_encoding}
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+                for scenario in args.scenarios:
+                    results.append(await run_scenario(client, args, scenario))
+    finally:
+        # Pooled aiosqlite connections own non-daemon threads that would keep the process alive.
+        await dispose_engines()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=10_000, help="e.g. 10000, 100000 or 1000000")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--sql-counts", action="store_true", help="also report SQL statements per request")
+    parser.add_argument("--accept-encoding", default="gzip, deflate, br", help='e.g. "identity", "gzip" or "br"')
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--db-async", action="store_true", help="run the app on aiosqlite")
+    parser.add_argument("--workdir", help="directory for the generated .env and SQLite file (reused when seeded)")
+    parser.add_argument("--env-file", help="benchmark an existing .env and database instead; it must already be seeded")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    workdir = prepare_workdir(args)
+    logging.getLogger("email_service").setLevel(logging.CRITICAL)
+    if not args.env_file:
+        seed(args)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "workdir": str(workdir),
+        "users": args.users,
+        "posts": args.posts,
+        "concurrency": args.concurrency,
+        "db_async": args.db_async,
+        "accept_encoding": args.accept_encoding,
+        "results": asyncio.run(run(args)),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        Path(args.out).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Search benchmark over a synthetic corpus.
+
+Run from the project root (it reads .env like the app does):
+
+    python benchmarks/search_bench.py --size 1000000 --backends python fts5
+
+Prints build time and per-query latency percentiles as JSON.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database import Base, ThreadedSession  # noqa: E402
+from models import Blogs, Users  # noqa: E402
+from search import InvertedIndex, search_blogs, tokenize  # noqa: E402
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(letters, k=rng.randint(3, 10))))
+    return sorted(words)
+
+
+def generate_posts(size: int, vocab: list[str], words_per_post: int, seed: int):
+    rng = random.Random(seed)
+    # Zipf-like weights so a few terms are common and most are rare.
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+    for i in range(1, size + 1):
+        words = rng.choices(vocab, cum_weights=cum_weights, k=words_per_post + 6)
+        yield i, " ".join(words[:6]), " ".join(words[6:])
+
+
+def percentiles(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(int(q * len(samples)), len(samples) - 1)] * 1000  # noqa: E731
+    return {
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def make_queries(vocab: list[str], count: int, seed: int) -> list[str]:
+    rng = random.Random(seed + 1)
+    common, mid = vocab[:50], vocab[50:2000]
+    return [" ".join([rng.choice(common), rng.choice(mid)][: rng.randint(1, 2)]) for _ in range(count)]
+
+
+def bench_python(args, vocab, queries) -> dict:
+    index = InvertedIndex()
+    started = time.perf_counter()
+    for doc_id, title, description in generate_posts(args.size, vocab, args.words, args.seed):
+        index.add(doc_id, title, description, author_id=doc_id % 1000)
+    build = time.perf_counter() - started
+
+    samples = []
+    for q in queries:
+        t0 = time.perf_counter()
+        index.search(tokenize(q), limit=20)
+        samples.append(time.perf_counter() - t0)
+
+    return {"backend": "python", "build_seconds": round(build, 2), **percentiles(samples)}
+
+
+def bench_fts5(args, vocab, queries) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(Users), [{"id": 1, "username": "bench", "email": "bench@example.com", "password_hash": "x", "role": "admin"}])
+            batch = []
+            for doc_id, title, description in generate_posts(args.size, vocab, args.words, args.seed):
+                batch.append({"id": doc_id, "title": title, "description": description, "author_id": 1})
+                if len(batch) == 10000:
+                    conn.execute(insert(Blogs), batch)
+                    batch = []
+            if batch:
+                conn.execute(insert(Blogs), batch)
+        build = time.perf_counter() - started
+
+        async def run_queries():
+            db = ThreadedSession(sessionmaker(bind=engine)())
+            samples = []
+            try:
+                for q in queries:
+                    t0 = time.perf_counter()
+                    await search_blogs(db, q, author_id=None, limit=20, offset=0, backend="fts5")
+                    samples.append(time.perf_counter() - t0)
+            finally:
+                await db.close()
+            return samples
+
+        samples = asyncio.run(run_queries())
+        engine.dispose()
+
+    return {"backend": "fts5", "build_seconds": round(build, 2), **percentiles(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=30, help="description length in words")
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backends", nargs="+", default=["python", "fts5"], choices=["python", "fts5"])
+    args = parser.parse_args()
+
+    vocab = make_vocabulary(args.vocab, random.Random(args.seed))
+    queries = make_queries(vocab, args.queries, args.seed)
+    runners = {"python": bench_python, "fts5": bench_fts5}
+
+    results = [runners[name](args, vocab, queries) for name in args.backends]
+    print(json.dumps({"size": args.size, "queries": args.queries, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
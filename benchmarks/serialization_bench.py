@@ -0,0 +1,76 @@
+"""Serialization benchmark for a page of blog rows.
+
+Run from the project root:
+
+    python benchmarks/serialization_bench.py --size 10000
+
+Compares the old per-row dict + jsonable_encoder + json.dumps path with the
+TypeAdapter bulk path the listing endpoint uses, and prints JSON.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from schemas import blog_page_adapter  # noqa: E402
+
+FIELDS = ("id", "title", "description", "created_date", "edit_date", "author_id", "author_name")
+Row = namedtuple("Row", FIELDS)
+
+
+def make_rows(size: int) -> list[Row]:
+    start = datetime(2024, 1, 1)
+    return [
+        Row(i, f"Post {i}", "lorem ipsum dolor sit amet " * 20, start + timedelta(seconds=i), None, i % 100, f"user{i % 100}")
+        for i in range(size, 0, -1)
+    ]
+
+
+def legacy(rows: list[Row]) -> bytes:
+    items = [{f: getattr(row, f) for f in FIELDS} for row in rows]
+    payload = jsonable_encoder({"items": items, "next_cursor": None})
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def bulk(rows: list[Row]) -> bytes:
+    page = blog_page_adapter.validate_python({"items": rows, "next_cursor": None}, from_attributes=True)
+    return blog_page_adapter.dump_json(page, include={"items": {"__all__": set(FIELDS)}, "next_cursor": True})
+
+
+def measure(fn, rows, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        body = fn(rows)
+        samples.append(time.perf_counter() - t0)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "min_ms": round(min(samples) * 1000, 2),
+        "bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = make_rows(args.size)
+    assert json.loads(legacy(rows[:50])) == json.loads(bulk(rows[:50]))
+
+    results = {"legacy": measure(legacy, rows, args.repeat), "typeadapter": measure(bulk, rows, args.repeat)}
+    results["speedup"] = round(results["legacy"]["median_ms"] / results["typeadapter"]["median_ms"], 2)
+    print(json.dumps({"size": args.size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+from typing import Iterable, Optional
+
+from cache import get_response_cache
+from compression import precompress
+from http_cache import CachedResponse
+
+
+ADMIN_NAMESPACE = "blogs:ns:admin"
+
+
+def author_namespace(author_id: int) -> str:
+    return f"blogs:ns:author:{author_id}"
+
+
+def author_posts_namespace(author_id: int) -> str:
+    # Single-post entries embed the author's name, so renames bump this too.
+    return f"blogs:ns:author:{author_id}:posts"
+
+
+def post_namespace(blog_id: int) -> str:
+    return f"blogs:ns:post:{blog_id}"
+
+
+async def list_cache_key(role: str, user_id: int, *parts) -> str:
+    namespace = ADMIN_NAMESPACE if role == "admin" else author_namespace(user_id)
+    version = await get_response_cache().version(namespace)
+    return ":".join(str(p) for p in (namespace, version, "list", *parts))
+
+
+async def post_cache_key(blog_id: int, author_id: int) -> str:
+    cache = get_response_cache()
+    namespace = post_namespace(blog_id)
+    version = await cache.version(namespace)
+    author_version = await cache.version(author_posts_namespace(author_id))
+    return f"{namespace}:{version}:{author_version}"
+
+
+async def cached_entry(key: str) -> Optional[CachedResponse]:
+    raw = await get_response_cache().get(key)
+    return CachedResponse.decode(raw) if raw is not None else None
+
+
+async def cached(key: str, loader) -> CachedResponse:
+    cache = get_response_cache()
+
+    async def load() -> bytes:
+        entry = await loader()
+        # Compressed once per fill, so hits skip both serialization and compression.
+        # Without a cache backend nothing is reused; CompressionMiddleware handles those.
+        if cache.backend is not None:
+            entry.encodings = precompress(entry.body)
+        return entry.encode()
+
+    return CachedResponse.decode(await cache.get_or_load(key, load))
+
+
+async def coalesce(key: str, fn):
+    """One call of fn per burst of concurrent requests for key, e.g. a miss's validators."""
+    return await get_response_cache().coalesce(key, fn)
+
+
+async def cached_post(blog_id: int, loader, owner_loader) -> CachedResponse:
+    """cached() for a single post, keyed on the post's and its author's versions.
+
+    `owner_loader` returns the post's author id (None if it does not exist). Owners
+    never change, so it is cached under its own key; looking it up before loading
+    keeps a load that raced a rename from landing under the renamed author's version.
+    """
+    cache = get_response_cache()
+    if cache.backend is None:
+        return await loader()
+
+    owner_key = f"{post_namespace(blog_id)}:author"
+    author_id = await cache.get(owner_key)
+    if author_id is None:
+        async def load_owner():
+            owner = await owner_loader()
+            if owner is not None:
+                await cache.set(owner_key, str(owner).encode())
+            return owner
+
+        author_id = await cache.coalesce(owner_key, load_owner)
+        if author_id is None:
+            return await loader()
+    return await cached(await post_cache_key(blog_id, int(author_id)), loader)
+
+
+async def invalidate_author(author_id: int) -> None:
+    await get_response_cache().bump(ADMIN_NAMESPACE, author_namespace(author_id), author_posts_namespace(author_id))
+
+
+async def invalidate_blog(author_id: int, blog_id: Optional[int] = None) -> None:
+    namespaces = [ADMIN_NAMESPACE, author_namespace(author_id)]
+    if blog_id is not None:
+        namespaces.append(post_namespace(blog_id))
+    await get_response_cache().bump(*namespaces)
+
+
+async def invalidate_blogs(author_id: int, blog_ids: Iterable[int]) -> None:
+    await get_response_cache().bump(ADMIN_NAMESPACE, author_namespace(author_id), *(post_namespace(i) for i in blog_ids))
@@ -0,0 +1,110 @@
+"""Per-author blog statistics in the author_stats table.
+
+Blog writes call update_author_stats in their own transaction; rebuild it from
+scratch (e.g. after a manual data fix or on an existing database) with:
+
+    python blog_stats.py rebuild
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+from database import AnySession, async_session_scope, database_url, dispose_engines, get_engine
+from models import AuthorStats, Blogs, Users
+
+
+def _latest(column, author_id: int):
+    # Index-backed (author_id, column) lookups, independent of how many posts exist.
+    return select(func.max(column)).where(Blogs.author_id == author_id).scalar_subquery()
+
+
+def _upsert(author_id: int, delta: int):
+    values = {
+        "author_id": author_id,
+        "post_count": delta,
+        "latest_created_date": _latest(Blogs.created_date, author_id),
+        "latest_edit_date": _latest(Blogs.edit_date, author_id),
+    }
+    backend = make_url(database_url()).get_backend_name()
+    if backend in ("mysql", "mariadb"):
+        stmt = mysql.insert(AuthorStats).values(**values)
+        new = stmt.inserted
+        return stmt.on_duplicate_key_update(
+            post_count=AuthorStats.post_count + new.post_count,
+            latest_created_date=new.latest_created_date,
+            latest_edit_date=new.latest_edit_date,
+        )
+
+    stmt = (postgresql if backend == "postgresql" else sqlite).insert(AuthorStats).values(**values)
+    new = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[AuthorStats.author_id],
+        set_={
+            "post_count": AuthorStats.post_count + new.post_count,
+            "latest_created_date": new.latest_created_date,
+            "latest_edit_date": new.latest_edit_date,
+        },
+    )
+
+
+async def update_author_stats(db: AnySession, author_id: int, delta: int = 0) -> None:
+    """Adds `delta` posts to the author's count and re-reads their latest dates.
+
+    Call after the blog write is flushed and before the commit, so both land together.
+    """
+    await db.execute(_upsert(author_id, delta))
+
+
+async def load_author_stats(db: AnySession):
+    return (await db.execute(
+        select(
+            AuthorStats.author_id,
+            Users.username.label("author_name"),
+            AuthorStats.post_count,
+            AuthorStats.latest_created_date,
+            AuthorStats.latest_edit_date,
+        )
+        .join(Users, Users.id == AuthorStats.author_id)
+        .where(AuthorStats.post_count > 0)
+        .order_by(AuthorStats.post_count.desc(), AuthorStats.author_id)
+    )).all()
+
+
+def rebuild_statement():
+    """INSERT ... SELECT filling author_stats from blogs in one pass."""
+    return insert(AuthorStats).from_select(
+        ["author_id", "post_count", "latest_created_date", "latest_edit_date"],
+        select(Blogs.author_id, func.count(Blogs.id), func.max(Blogs.created_date), func.max(Blogs.edit_date))
+        .group_by(Blogs.author_id),
+    )
+
+
+async def rebuild_author_stats(db: AnySession) -> int:
+    await db.execute(delete(AuthorStats))
+    await db.execute(rebuild_statement())
+    await db.commit()
+    return await db.scalar(select(func.count()).select_from(AuthorStats))
+
+
+async def _rebuild() -> None:
+    AuthorStats.__table__.create(get_engine(), checkfirst=True)
+    try:
+        async with async_session_scope() as db:
+            authors = await rebuild_author_stats(db)
+        print(f"Rebuilt author_stats for {authors} authors")
+    finally:
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the author_stats summary table.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    asyncio.run(_rebuild())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from settings import get_settings
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryBackend:
+    """Per-process cache backend; invalidations are only seen by this worker."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = TTLCache(maxsize=maxsize, ttl=float("inf"))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._entries.set(key, value)
+
+    async def version(self, namespace: str) -> int:
+        value = self._versions.get(namespace)
+        if value is None:
+            # Seed from the clock so an evicted counter never reuses an old version.
+            value = time.time_ns()
+            self._versions.set(namespace, value)
+        return value
+
+    async def bump(self, namespace: str) -> None:
+        self._versions.set(namespace, await self.version(namespace) + 1)
+
+
+class RedisBackend:
+    """Shared backend for any Redis-compatible server (or fakeredis in tests)."""
+
+    def __init__(self, client, ttl: float = 30.0):
+        self.client = client
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float = 30.0) -> "RedisBackend":
+        import redis.asyncio as redis
+
+        return cls(redis.Redis.from_url(url), ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.client.set(key, value, px=int(self.ttl * 1000))
+
+    async def version(self, namespace: str) -> int:
+        value = await self.client.get(namespace)
+        if value is None:
+            await self.client.set(namespace, time.time_ns(), nx=True)
+            value = await self.client.get(namespace)
+        return int(value)
+
+    async def bump(self, namespace: str) -> None:
+        await self.version(namespace)
+        await self.client.incr(namespace)
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one in-flight call."""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+
+class ResponseCache:
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._flight = SingleFlight()
+
+    async def version(self, namespace: str) -> int:
+        return await self.backend.version(namespace) if self.backend else 0
+
+    async def bump(self, *namespaces: str) -> None:
+        if self.backend:
+            for namespace in namespaces:
+                await self.backend.bump(namespace)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.backend.get(key) if self.backend else None
+
+    async def set(self, key: str, value: bytes) -> None:
+        if self.backend:
+            await self.backend.set(key, value)
+
+    async def coalesce(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs fn once for all concurrent callers with the same key; nothing is stored."""
+        return await self._flight.do(key, fn)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        if self.backend is None:
+            return await loader()
+
+        cached = await self.backend.get(key)
+        if cached is not None:
+            return cached
+
+        async def load_and_store() -> bytes:
+            value = await loader()
+            await self.backend.set(key, value)
+            return value
+
+        return await self._flight.do(key, load_and_store)
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCache:
+    """Built on first use, so it follows the settings in effect by then."""
+    settings = get_settings()
+    ttl = settings.response_cache_ttl
+
+    if settings.response_cache_backend == "redis":
+        if not settings.response_cache_url:
+            raise RuntimeError("RESPONSE_CACHE_URL is missing in .env")
+        return ResponseCache(RedisBackend.from_url(settings.response_cache_url, ttl=ttl))
+    if settings.response_cache_backend == "memory":
+        return ResponseCache(MemoryBackend(maxsize=settings.response_cache_size, ttl=ttl))
+    return ResponseCache(None)
+
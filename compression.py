@@ -0,0 +1,123 @@
+import gzip
+from typing import Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+from settings import get_settings
+
+# Tried in this order when the client weighs them equally.
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def preferred_encoding(accept_encoding: str) -> Optional[str]:
+    """The supported coding with the highest q-value in an Accept-Encoding header, if any."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for coding in ENCODINGS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    settings = get_settings()
+    if coding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_level)
+    # mtime=0 keeps the output, and so cached copies, byte-identical across runs.
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+def precompress(body: bytes) -> dict[str, bytes]:
+    """Every supported encoding of `body`, for storing next to a cached response."""
+    settings = get_settings()
+    if not settings.compression_enabled or len(body) < settings.compression_min_size:
+        return {}
+    return {coding: compress(body, coding) for coding in ENCODINGS}
+
+
+def weak_etag(etag: str) -> str:
+    # The compressed bytes differ from the ones the strong tag was computed over.
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing complete JSON/text responses the client can decode.
+
+    Streamed responses (more_body) and responses that already carry a
+    Content-Encoding, such as the export or a precompressed cache entry, pass through.
+    """
+
+    def __init__(self, app, min_size: Optional[int] = None):
+        self.app = app
+        self.min_size = get_settings().compression_min_size if min_size is None else min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = preferred_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                headers = MutableHeaders(scope=message)
+                if (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+
+                # Shared caches must key on Accept-Encoding even when this client gets identity.
+                if "accept-encoding" not in headers.get("vary", "").lower():
+                    headers.add_vary_header("Accept-Encoding")
+                if coding is None:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            passthrough = True
+            if message.get("more_body") or len(body) < self.min_size:
+                await send(start)
+                await send(message)
+                return
+
+            body = compress(body, coding)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(body))
+            if "etag" in headers:
+                headers["ETag"] = weak_etag(headers["etag"])
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
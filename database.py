@@ -1,19 +1,331 @@
-from sqlalchemy import create_engine
+import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from sqlalchemy import Table, UniqueConstraint, create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from typing import Annotated
+from starlette.concurrency import run_in_threadpool
+from typing import Annotated, AsyncIterator, Optional, Sequence, Union
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from dotenv import dotenv_values
 
-env = dotenv_values(".env")
-DATABASE_URL = env["DB_CONNECTION"]
+from metrics import instrument_engine, record_pool_wait
+from settings import get_settings
+
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqldb": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def database_url() -> str:
+    url = get_settings().db_connection
+    if not url:
+        raise RuntimeError("DB_CONNECTION is missing in .env")
+    return url
+
+
+def read_database_url() -> Optional[str]:
+    """Optional read replica for read-only routes; None means the primary serves reads."""
+    return get_settings().db_read_connection
+
+
+def db_async() -> bool:
+    # DB_ASYNC=true runs the routers on a native async driver (aiomysql, aiosqlite).
+    # Otherwise the same routers drive the sync engine from the threadpool.
+    return get_settings().db_async
+
+
+POOL_METRICS = {}
+_pool_metrics_lock = threading.Lock()
+
+
+def _record(stats: dict, **deltas) -> None:
+    with _pool_metrics_lock:
+        for key, delta in deltas.items():
+            stats[key] += delta
+
+
+def _timed_pool_class(base, stats: dict):
+    class TimedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                elapsed = time.perf_counter() - started
+                _record(stats, checkout_wait_seconds_total=elapsed)
+                record_pool_wait(elapsed)
+                stats["checkout_wait_seconds_max"] = max(stats["checkout_wait_seconds_max"], elapsed)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def _engine_options(url: str, name: str, is_async: bool) -> dict:
+    stats = POOL_METRICS.setdefault(name, {
+        "connections_total": 0,
+        "checkouts_total": 0,
+        "checked_out": 0,
+        "checkout_wait_seconds_total": 0.0,
+        "checkout_wait_seconds_max": 0.0,
+    })
+    settings = get_settings()
+    options = {"pool_pre_ping": settings.db_pool_pre_ping, "pool_recycle": settings.db_pool_recycle}
+
+    # SQLite picks its own pool class and does not take size/overflow settings.
+    if make_url(url).get_backend_name() != "sqlite":
+        base = AsyncAdaptedQueuePool if is_async else QueuePool
+        options.update(
+            poolclass=_timed_pool_class(base, stats),
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+
+def _instrument(sync_engine, name: str):
+    stats = POOL_METRICS[name]
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _record(stats, connections_total=1)
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _record(stats, checkouts_total=1, checked_out=1)
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _record(stats, checked_out=-1)
+
+    instrument_engine(sync_engine)
+    return sync_engine
+
+
+def _sqlite_savepoints(sync_engine) -> None:
+    # pysqlite/aiosqlite defer BEGIN until the first INSERT/UPDATE/DELETE, so a
+    # SAVEPOINT opened before one becomes the outer transaction and its RELEASE
+    # commits. Open the real transaction first; plain reads keep the driver's default.
+    @event.listens_for(sync_engine, "savepoint")
+    def _on_savepoint(conn, name):
+        if not conn.connection.driver_connection.in_transaction:
+            conn.exec_driver_sql("BEGIN")
+
+
+def _configure(sync_engine, url: str, name: str):
+    if make_url(url).get_backend_name() == "sqlite":
+        _sqlite_savepoints(sync_engine)
+    return _instrument(sync_engine, name)
+
+
+def build_engine(url: str, name: str):
+    return _configure(create_engine(url, **_engine_options(url, name, False)), url, name)
+
+
+def build_async_engine(url: str, name: str):
+    async_eng = create_async_engine(url, **_engine_options(url, name, True))
+    _configure(async_eng.sync_engine, url, name)
+    return async_eng
+
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+# Engines and session factories are built on first use, so importing the models or
+# routers opens no pool and forked workers do not inherit connections.
+@lru_cache(maxsize=None)
+def get_engine():
+    return build_engine(database_url(), "primary")
+
+
+@lru_cache(maxsize=None)
+def get_read_engine():
+    url = read_database_url()
+    return build_engine(url, "replica") if url else get_engine()
+
+
+@lru_cache(maxsize=None)
+def get_async_engine():
+    url = get_settings().db_async_connection or to_async_url(database_url())
+    return build_async_engine(url, "primary")
+
+
+@lru_cache(maxsize=None)
+def get_async_read_engine():
+    url = read_database_url()
+    if not url:
+        return get_async_engine()
+    return build_async_engine(get_settings().db_async_read_connection or to_async_url(url), "replica")
+
+
+@lru_cache(maxsize=None)
+def session_factory(read_only: bool = False, is_async: bool = False):
+    if is_async:
+        bind = get_async_read_engine() if read_only else get_async_engine()
+        return async_sessionmaker(bind, autoflush=False, expire_on_commit=False)
+    bind = get_read_engine() if read_only else get_engine()
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=bind)
+
+
+def built_engines() -> list:
+    """Engines created so far, primary first, without building the rest."""
+    builders = (get_engine, get_read_engine, get_async_engine, get_async_read_engine)
+    engines = []
+    for builder in builders:
+        if builder.cache_info().currsize:
+            eng = builder()
+            if eng not in engines:
+                engines.append(eng)
+    return engines
+
+
+async def dispose_engines() -> None:
+    for eng in built_engines():
+        if isinstance(eng, AsyncEngine):
+            await eng.dispose()
+        else:
+            eng.dispose()
+
+
+def _reset_pools_after_fork() -> None:
+    # A forked worker must not reuse the parent's sockets; drop them without closing
+    # (that would close the parent's too) and let the child connect on demand.
+    for eng in built_engines():
+        (eng.sync_engine if isinstance(eng, AsyncEngine) else eng).dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+def _warm_sync(eng, count: int) -> None:
+    conns = [eng.connect() for _ in range(count)]
+    for conn in conns:
+        conn.close()
+
+
+async def warm_pool(count: Optional[int] = None) -> int:
+    """Opens `count` connections per active engine up front so early requests skip the connect."""
+    settings = get_settings()
+    if count is None:
+        count = settings.db_pool_warmup if settings.db_pool_warmup is not None else settings.db_pool_size
+    if count <= 0:
+        return 0
+
+    if db_async():
+        engines = {get_async_engine(), get_async_read_engine()}
+        for eng in engines:
+            conns = [await eng.connect().start() for _ in range(count)]
+            for conn in conns:
+                await conn.close()
+    else:
+        engines = {get_engine(), get_read_engine()}
+        for eng in engines:
+            await run_in_threadpool(_warm_sync, eng, count)
+    return count * len(engines)
+
+
+def pool_status() -> dict:
+    engines = {"primary": active_sync_engine()}
+    if read_database_url():
+        engines["replica"] = get_async_read_engine().sync_engine if db_async() else get_read_engine()
+
+    status = {}
+    for name, eng in engines.items():
+        snapshot = dict(POOL_METRICS[name])
+        pool = eng.pool
+        if isinstance(pool, QueuePool):
+            snapshot.update(size=pool.size(), idle=pool.checkedin(), overflow=max(pool.overflow(), 0))
+        status[name] = snapshot
+    return status
+
+
+class ThreadedSession:
+    """AsyncSession-compatible wrapper that runs a sync Session in the threadpool."""
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    def _execute(self, statement, params=None, **kwargs):
+        result = self.sync_session.execute(statement, params, **kwargs)
+        # Buffer rows in the worker thread so iterating them never blocks the loop.
+        # ORM bulk INSERT/UPDATE results carry no rows and cannot be frozen.
+        return result.freeze()() if getattr(result._metadata, "returns_rows", True) else result
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self._execute, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        result = await self.execute(statement, params, **kwargs)
+        return result.scalar()
+
+    async def scalars(self, statement, params=None, **kwargs):
+        result = await self.execute(statement, params, **kwargs)
+        return result.scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def refresh(self, instance, attribute_names=None) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        """SAVEPOINT released on success and rolled back on error, like AsyncSession.begin_nested()."""
+        nested = await run_in_threadpool(self.sync_session.begin_nested)
+        try:
+            yield nested
+        except BaseException:
+            await run_in_threadpool(nested.rollback)
+            raise
+        await run_in_threadpool(nested.commit)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+AnySession = Union[AsyncSession, ThreadedSession]
+
+
 def get_db():
-    db = SessionLocal()
+    db = Session(get_engine(), autoflush=False)
     try:
         yield db
     finally:
@@ -21,3 +333,105 @@ def get_db():
 
 db_dependency = Annotated[Session, Depends(get_db)]
 
+
+@asynccontextmanager
+async def async_session_scope(read_only: bool = False):
+    if db_async():
+        async with session_factory(read_only, True)() as session:
+            yield session
+        return
+
+    session = ThreadedSession(session_factory(read_only)())
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_async_db():
+    async with async_session_scope() as db:
+        yield db
+
+async_db_dependency = Annotated[AnySession, Depends(get_async_db)]
+
+
+async def get_async_read_db(primary: async_db_dependency):
+    # Checked per request. Without a replica, hand out the request's get_async_db
+    # session so a route using both shares one; it connects only when queried.
+    if not read_database_url():
+        yield primary
+        return
+    async with async_session_scope(read_only=True) as db:
+        yield db
+
+async_read_db_dependency = Annotated[AnySession, Depends(get_async_read_db)]
+
+
+async def stream_partitions(db: AnySession, statement, size: int) -> AsyncIterator[Sequence]:
+    """Yields rows in batches of `size` from a server-side cursor."""
+    statement = statement.execution_options(yield_per=size)
+    if isinstance(db, ThreadedSession):
+        result = await run_in_threadpool(db.sync_session.execute, statement)
+        partitions = result.partitions()
+        while (rows := await run_in_threadpool(next, partitions, None)) is not None:
+            yield rows
+        return
+
+    result = await db.stream(statement)
+    async for rows in result.partitions():
+        yield rows
+
+
+def _legacy_unique_patterns(table: Table, column: str) -> list[str]:
+    # Tables created before the constraints were named got them from unique=True:
+    # MySQL calls that index after the column ("for key 'username'", 8.0 prefixes
+    # the table), PostgreSQL names the constraint users_username_key.
+    return [rf"for key '(?:{table.name}\.)?{column}'", rf'"{table.name}_{column}_key"']
+
+
+def violated_constraint(exc: IntegrityError, table: Table) -> Optional[str]:
+    """Name of the unique constraint on `table` that `exc` reports, if any.
+
+    MySQL and PostgreSQL name the constraint in the message; SQLite lists its columns.
+    """
+    message = str(exc.orig)
+    for constraint in table.constraints:
+        if not isinstance(constraint, UniqueConstraint) or not constraint.name:
+            continue
+        columns = ", ".join(f"{table.name}.{column.name}" for column in constraint.columns)
+        if constraint.name in message or message.endswith(f"failed: {columns}"):
+            return constraint.name
+        if len(constraint.columns) == 1:
+            column = next(iter(constraint.columns)).name
+            if any(re.search(pattern, message) for pattern in _legacy_unique_patterns(table, column)):
+                return constraint.name
+    return None
+
+
+def active_sync_engine():
+    return get_async_engine().sync_engine if db_async() else get_engine()
+
+
+@contextmanager
+def count_queries(bind=None):
+    bind = bind or active_sync_engine()
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", _record)
+
+
+@contextmanager
+def assert_max_queries(limit: int, bind=None):
+    with count_queries(bind) as statements:
+        yield statements
+
+    if len(statements) > limit:
+        listing = "\n".join(statements)
+        raise AssertionError(f"Expected at most {limit} queries, got {len(statements)}:\n{listing}")
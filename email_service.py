@@ -1,49 +1,210 @@
+import asyncio
+import logging
 import aiosmtplib
+from datetime import timedelta
 from email.message import EmailMessage
-from dotenv import dotenv_values
+from typing import Optional
+from sqlalchemy import select
 
-env = dotenv_values(".env")
+from cache import TTLCache
+from database import AnySession, async_session_scope
+from models import EmailOutbox, utcnow
+from settings import get_settings
 
-SMTP_HOST = env["SMTP_HOST"]
-SMTP_PORT = int(env["SMTP_PORT"])
-SMTP_USER = env["SMTP_USER"]
-SMTP_PASSWORD = env["SMTP_PASSWORD"]
-SMTP_FROM = env["SMTP_FROM"]
+logger = logging.getLogger(__name__)
+
+# Entries expire after LOGIN_NOTICE_WINDOW, passed per set().
+_recent_login_notices = TTLCache(maxsize=10000)
+
+
+def enqueue_email(db: AnySession, to_email: str, subject: str, body: str, kind: str, dedupe_key: str = None) -> EmailOutbox:
+    message = EmailOutbox(to_email=to_email, subject=subject, body=body, kind=kind, dedupe_key=dedupe_key)
+    db.add(message)
+    return message
 
-async def send_welcome_email(to_email: str, username: str):
-    msg = EmailMessage()
-    msg["From"] = SMTP_FROM
-    msg["To"] = to_email
-    msg["Subject"] = "Welcome to our system"
-    msg.set_content(
-        f"Hello {username},\n\nWelcome to our system! We are happy to have you.\n\nRegards,\nTeam"
-    )
 
-    await aiosmtplib.send(
-        msg,
-        hostname=SMTP_HOST,
-        port=int(SMTP_PORT),
-        start_tls=True,        
-        username=SMTP_USER,
-        password=SMTP_PASSWORD,
+def enqueue_welcome_email(db: AnySession, to_email: str, username: str) -> EmailOutbox:
+    return enqueue_email(
+        db,
+        to_email,
+        "Welcome to our system",
+        f"Hello {username},\n\nWelcome to our system! We are happy to have you.\n\nRegards,\nTeam",
+        kind="welcome",
     )
 
 
-async def send_login_message(to_email: str, username: str):
-    msg = EmailMessage()
-    msg["From"] = SMTP_FROM
-    msg["To"] = to_email
-    msg["Subject"] = "Logging In"
-    msg.set_content(
-        f"Hello {username},\n\nYou have successfully logged in.\n\nRegards,\nTeam"
+async def enqueue_login_message(db: AnySession, to_email: str, username: str) -> bool:
+    dedupe_key = f"login:{username}"
+    if _recent_login_notices.get(dedupe_key):
+        return False
+
+    window = get_settings().login_notice_window
+    since = utcnow() - timedelta(seconds=window)
+    recent = await db.scalar(
+        select(EmailOutbox.id).where(EmailOutbox.dedupe_key == dedupe_key, EmailOutbox.created_at >= since).limit(1)
     )
+    _recent_login_notices.set(dedupe_key, True, ttl=window)
+    if recent:
+        return False
 
-    await aiosmtplib.send(
-        msg,
-        hostname=SMTP_HOST,
-        port=int(SMTP_PORT),
-        start_tls=True,        
-        username=SMTP_USER,
-        password=SMTP_PASSWORD,
+    enqueue_email(
+        db,
+        to_email,
+        "Logging In",
+        f"Hello {username},\n\nYou have successfully logged in.\n\nRegards,\nTeam",
+        kind="login",
+        dedupe_key=dedupe_key,
     )
-    
\ No newline at end of file
+    return True
+
+
+def _build_message(row: EmailOutbox) -> EmailMessage:
+    settings = get_settings()
+    msg = EmailMessage()
+    msg["From"] = settings.smtp_from or settings.smtp_user
+    msg["To"] = row.to_email
+    msg["Subject"] = row.subject
+    msg.set_content(row.body)
+    return msg
+
+
+def retry_delay(attempts: int) -> float:
+    settings = get_settings()
+    return min(settings.email_retry_base_seconds * 2 ** (attempts - 1), settings.email_retry_max_seconds)
+
+
+class EmailDispatcher:
+    """Drains the email outbox over one persistent SMTP connection.
+
+    SMTP_* are read when it connects; without SMTP_HOST mail stays queued. Unset
+    arguments follow EMAIL_BATCH_SIZE and EMAIL_POLL_INTERVAL.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, poll_interval: Optional[float] = None):
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._smtp = None
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    @property
+    def batch_size(self) -> int:
+        return get_settings().email_batch_size if self._batch_size is None else self._batch_size
+
+    @property
+    def poll_interval(self) -> float:
+        return get_settings().email_poll_interval if self._poll_interval is None else self._poll_interval
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+
+        settings = get_settings()
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.smtp_host,
+            port=settings.smtp_port,
+            start_tls=settings.smtp_starttls,
+            timeout=settings.smtp_timeout,
+        )
+        await smtp.connect()
+        if settings.smtp_user:
+            await smtp.login(settings.smtp_user, settings.smtp_password or "")
+        self._smtp = smtp
+        return smtp
+
+    async def _disconnect(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except aiosmtplib.SMTPException:
+            smtp.close()
+
+    async def _send(self, msg: EmailMessage) -> None:
+        try:
+            await (await self._connect()).send_message(msg)
+        except aiosmtplib.SMTPServerDisconnected:
+            # The server dropped an idle connection; reconnect once and resend.
+            self._smtp = None
+            await (await self._connect()).send_message(msg)
+
+    async def dispatch_once(self) -> int:
+        now = utcnow()
+        async with async_session_scope() as db:
+            rows = (await db.scalars(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+
+            for row in rows:
+                try:
+                    await self._send(_build_message(row))
+                except (aiosmtplib.SMTPException, OSError) as exc:
+                    row.attempts += 1
+                    row.last_error = str(exc)[:1000]
+                    if row.attempts >= get_settings().email_max_attempts:
+                        row.status = "failed"
+                        logger.error("Giving up on email %s to %s: %s", row.id, row.to_email, exc)
+                    else:
+                        row.next_attempt_at = utcnow() + timedelta(seconds=retry_delay(row.attempts))
+                    await self._disconnect()
+                else:
+                    row.status = "sent"
+                    row.sent_at = utcnow()
+
+            await db.commit()
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.dispatch_once()
+            except Exception:
+                logger.exception("Email dispatch failed")
+                processed = 0
+
+            if processed >= self.batch_size:
+                continue
+            if self._stopping:
+                break
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if not get_settings().smtp_host:
+            logger.warning("SMTP_HOST is not set; outgoing email stays queued in the outbox")
+            return
+        if self._task is None:
+            self._stopping = False
+            # The event binds to the loop that first waits on it; a restarted app runs a new loop.
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if self._task is None:
+            return
+
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        finally:
+            self._task = None
+            await self._disconnect()
+
+
+email_dispatcher = EmailDispatcher()
@@ -0,0 +1,20 @@
+"""gunicorn main:app  (picked up automatically from the working directory)
+
+Same knobs as serve.py. preload_app imports the app once in the master, so nothing
+built at import may hold connections, pipes or threads: database engines and the
+password-hashing pool are created on first use and dropped in forked children
+(database._reset_pools_after_fork, security.get_hash_pool).
+"""
+from serve import worker_count
+from settings import get_settings
+
+settings = get_settings()
+
+bind = f"{settings.web_host}:{settings.web_port}"
+workers = worker_count(settings)
+# UvicornWorker picks uvloop and httptools when they are installed.
+worker_class = "uvicorn.workers.UvicornWorker"
+graceful_timeout = settings.graceful_shutdown_timeout
+# A worker busy for this long (e.g. a stuck request) is restarted by the arbiter.
+timeout = max(int(settings.graceful_shutdown_timeout) * 2, 60)
+preload_app = True
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import orjson
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from compression import preferred_encoding, weak_etag
+
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # MySQL DATETIME comes back naive; the server stores UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def format_http_date(value: datetime) -> str:
+    return format_datetime(_as_utc(value), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _as_utc(last_modified) <= since
+
+    return False
+
+
+def accepts_encoding(request: Request, coding: str) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.partition(";")
+        if name.strip().lower() not in (coding, "*"):
+            continue
+        q = params.strip()
+        try:
+            return not q.startswith("q=") or float(q[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def set_cache_headers(response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    # Identity, compressed and 304 responses to the same URL differ only by Accept-Encoding.
+    response.headers["Vary"] = "Accept-Encoding"
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, last_modified)
+    return response
+
+
+def render_json(payload: Any) -> bytes:
+    return orjson.dumps(payload)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+    owner_id: Optional[int] = None
+    # Content-coding -> compressed body (see compression.precompress).
+    encodings: dict[str, bytes] = field(default_factory=dict)
+
+    def encode(self) -> bytes:
+        meta = {
+            "etag": self.etag,
+            "last_modified": self.last_modified.isoformat() if self.last_modified else None,
+            "owner_id": self.owner_id,
+            "encodings": {coding: len(data) for coding, data in self.encodings.items()},
+        }
+        head = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+        return b"".join([head, b"\n", *self.encodings.values(), self.body])
+
+    @classmethod
+    def decode(cls, raw: bytes) -> "CachedResponse":
+        head, _, rest = raw.partition(b"\n")
+        meta = json.loads(head)
+        last_modified = datetime.fromisoformat(meta["last_modified"]) if meta["last_modified"] else None
+        encodings, offset = {}, 0
+        for coding, size in meta.get("encodings", {}).items():
+            encodings[coding] = rest[offset:offset + size]
+            offset += size
+        return cls(
+            body=rest[offset:], etag=meta["etag"], last_modified=last_modified, owner_id=meta["owner_id"], encodings=encodings,
+        )
+
+    def to_response(self, request: Optional[Request] = None) -> Response:
+        coding = preferred_encoding(request.headers.get("accept-encoding", "")) if request and self.encodings else None
+        if coding not in self.encodings:
+            response = Response(content=self.body, media_type="application/json")
+            set_cache_headers(response, self.etag, self.last_modified)
+            return response
+
+        response = Response(
+            content=self.encodings[coding],
+            media_type="application/json",
+            headers={"Content-Encoding": coding},
+        )
+        set_cache_headers(response, weak_etag(self.etag), self.last_modified)
+        return response
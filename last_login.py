@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, update
+
+from database import async_session_scope
+from models import Users
+from security import invalidate_principal
+from settings import get_settings
+
+FLUSH_CHUNK_SIZE = 500
+
+LAST_LOGIN_METRICS = {"pending": 0, "flushes_total": 0, "rows_flushed_total": 0}
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """Coalesces last_login writes per user and flushes them in batched UPDATE ... CASE statements.
+
+    Unset arguments follow LAST_LOGIN_FLUSH_INTERVAL and LAST_LOGIN_MAX_PENDING.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None, max_pending: Optional[int] = None):
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._pending: dict[int, datetime] = {}
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._stopping = False
+
+    @property
+    def flush_interval(self) -> float:
+        return get_settings().last_login_flush_interval if self._flush_interval is None else self._flush_interval
+
+    @property
+    def max_pending(self) -> int:
+        return get_settings().last_login_max_pending if self._max_pending is None else self._max_pending
+
+    def record(self, user_id: int, when: datetime) -> None:
+        current = self._pending.get(user_id)
+        if current is None or when > current:
+            self._pending[user_id] = when
+        LAST_LOGIN_METRICS["pending"] = len(self._pending)
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def latest(self, user_id: int, stored: Optional[datetime]) -> Optional[datetime]:
+        """The newer of the stored value and a login still waiting to be flushed."""
+        pending = self._pending.get(user_id)
+        if pending is None:
+            return stored
+        return pending if stored is None or pending > stored else stored
+
+    async def flush(self) -> int:
+        async with self._lock:
+            batch, self._pending = self._pending, {}
+            LAST_LOGIN_METRICS["pending"] = 0
+            if not batch:
+                return 0
+
+            items = sorted(batch.items())
+            try:
+                async with async_session_scope() as db:
+                    for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+                        chunk = dict(items[start:start + FLUSH_CHUNK_SIZE])
+                        await db.execute(
+                            update(Users)
+                            .where(Users.id.in_(chunk))
+                            .values(last_login=case(chunk, value=Users.id))
+                            .execution_options(synchronize_session=False)
+                        )
+                    await db.commit()
+            except Exception:
+                # Put the batch back, keeping anything newer recorded meanwhile.
+                for user_id, when in batch.items():
+                    self.record(user_id, when)
+                raise
+
+            # Cached principals carry last_login; drop them so /auth/me reloads the flushed value.
+            invalidate_principal(*batch)
+            LAST_LOGIN_METRICS["flushes_total"] += 1
+            LAST_LOGIN_METRICS["rows_flushed_total"] += len(batch)
+            return len(batch)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing last_login updates failed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            # The event binds to the loop that first waits on it; a restarted app runs a new loop.
+            self._wakeup = asyncio.Event()
+            if len(self._pending) >= self.max_pending:
+                self._wakeup.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+            finally:
+                self._task = None
+
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Flushing last_login updates at shutdown failed; %s dropped", len(self._pending))
+
+
+last_login_buffer = LastLoginBuffer()
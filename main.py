@@ -1,17 +1,66 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from routers import auth, blogs
+from compression import CompressionMiddleware
+from database import async_session_scope, dispose_engines, warm_pool
+from email_service import email_dispatcher
+from last_login import last_login_buffer
+from metrics import MetricsMiddleware
+from revocation import revocation_store
+from routers import auth, blogs, metrics
+from search import rebuild_search_index, resolve_backend
+from settings import get_settings
 
-app = FastAPI()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker process, after any fork, before it accepts requests.
+    await warm_pool()
+    if resolve_backend() == "python":
+        async with async_session_scope(read_only=True) as db:
+            await rebuild_search_index(db)
 
-app.include_router(auth.router)
-app.include_router(blogs.router)
\ No newline at end of file
+    email_dispatcher.start()
+    revocation_store.start()
+    last_login_buffer.start()
+    try:
+        yield
+    finally:
+        # The server has already stopped accepting and drained in-flight requests
+        # (GRACEFUL_SHUTDOWN_TIMEOUT); flush buffered work before closing the pools.
+        await last_login_buffer.stop()
+        await revocation_store.stop()
+        await email_dispatcher.stop()
+        await dispose_engines()
+
+
+def create_app() -> FastAPI:
+    """Builds the app from the settings in effect when it is called."""
+    settings = get_settings()
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    if settings.compression_enabled:
+        app.add_middleware(CompressionMiddleware)
+
+    # Added last so it is outermost and its timings include compression.
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+
+    app.include_router(auth.router)
+    app.include_router(blogs.router)
+    if settings.metrics_enabled:
+        app.include_router(metrics.router)
+    return app
+
+
+app = create_app()
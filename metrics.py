@@ -0,0 +1,206 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+
+from settings import get_settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger("slow_query")
+
+
+@dataclass
+class RequestStats:
+    scope: dict = field(repr=False)
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        # Label by route template, not raw path, to keep series bounded.
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+# The stats object is shared with threadpool workers, which receive a copy of the context.
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Iterable[float], labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = (*self.labelnames, "le")
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_labels(names, (*labels, bound))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(names, (*labels, '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+REQUESTS_TOTAL = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", LATENCY_BUCKETS, ("method", "route"))
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements executed per request.", QUERY_COUNT_BUCKETS, ("method", "route"))
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL statements per request.", LATENCY_BUCKETS, ("method", "route"))
+REQUEST_POOL_WAIT = Counter("http_request_db_pool_wait_seconds_total", "Time spent waiting for a pooled connection.", ("method", "route"))
+DB_QUERIES_TOTAL = Counter("db_queries_total", "SQL statements executed, including outside requests.")
+SLOW_QUERIES_TOTAL = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_SECONDS.", ("route",))
+
+METRICS = [REQUESTS_TOTAL, REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_SECONDS, REQUEST_POOL_WAIT, DB_QUERIES_TOTAL, SLOW_QUERIES_TOTAL]
+
+_collectors: list[Callable[[], Iterable[str]]] = []
+
+
+def register_collector(fn: Callable[[], Iterable[str]]) -> None:
+    _collectors.append(fn)
+
+
+def sample_lines(name: str, help: str, samples: dict[tuple, float], labelnames: tuple = ()) -> list[str]:
+    """Renders externally kept values; names ending in _total are typed as counters."""
+    kind = "counter" if name.endswith("_total") else "gauge"
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples.items():
+        lines.append(f"{name}{_labels(labelnames, labels)} {value}")
+    return lines
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+def record_pool_wait(seconds: float) -> None:
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def instrument_engine(sync_engine) -> None:
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES_TOTAL.inc()
+
+        stats = current_request.get()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += elapsed
+
+        if elapsed >= get_settings().slow_query_seconds:
+            route = stats.route if stats is not None else "-"
+            SLOW_QUERIES_TOTAL.inc((route,))
+            logger.warning("Slow query (%.3fs) in %s: %s", elapsed, route, " ".join(statement.split())[:1000])
+
+
+def _server_timing(stats: RequestStats, elapsed: float) -> bytes:
+    return (
+        f'app;dur={elapsed * 1000:.1f}, db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_count} queries", '
+        f"pool;dur={stats.pool_wait_seconds * 1000:.1f}"
+    ).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, SQL count/time and pool wait per route."""
+
+    def __init__(self, app, server_timing: Optional[bool] = None):
+        self.app = app
+        self.server_timing = get_settings().server_timing if server_timing is None else server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    timing = _server_timing(stats, time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", timing)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            labels = (scope["method"], stats.route)
+            REQUESTS_TOTAL.inc((*labels, status))
+            REQUEST_LATENCY.observe(labels, time.perf_counter() - started)
+            REQUEST_QUERIES.observe(labels, stats.sql_count)
+            REQUEST_DB_SECONDS.observe(labels, stats.sql_seconds)
+            if stats.pool_wait_seconds:
+                REQUEST_POOL_WAIT.inc(labels, stats.pool_wait_seconds)
@@ -0,0 +1,144 @@
+"""Brings an existing database up to the current models: python migrate.py
+
+Fresh databases get everything from Base.metadata.create_all. Each step here
+checks the live schema first, so running it again is a no-op.
+"""
+import argparse
+
+from sqlalchemy import func, inspect, select, text
+
+from blog_stats import rebuild_statement
+from database import get_engine
+from models import BLOGS_FTS_DDL, AuthorStats, Blogs, EmailOutbox, RevokedToken
+
+
+def add_blogs_version(conn) -> bool:
+    # ETag validators read blogs.version; existing rows start at 1.
+    if "version" in {column["name"] for column in inspect(conn).get_columns("blogs")}:
+        return False
+    conn.execute(text("ALTER TABLE blogs ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+    return True
+
+
+def create_table(model):
+    """Step creating `model`'s table with its indexes when it does not exist yet."""
+    def step(conn) -> bool:
+        if inspect(conn).has_table(model.__tablename__):
+            return False
+        model.__table__.create(conn)
+        return True
+    return step
+
+
+def create_author_stats(conn) -> bool:
+    # Blog writes upsert into author_stats, so it must exist and start out correct.
+    if inspect(conn).has_table(AuthorStats.__tablename__):
+        return False
+    AuthorStats.__table__.create(conn)
+    conn.execute(rebuild_statement())
+    return True
+
+
+def _blogs_index_names(conn) -> set[str]:
+    return {index["name"] for index in inspect(conn).get_indexes("blogs")}
+
+
+def create_blogs_indexes(conn) -> bool:
+    """Listing and author_stats indexes added to Blogs after the table was created."""
+    existing = _blogs_index_names(conn)
+    for index in Blogs.__table__.indexes:
+        if index.name not in existing:
+            # Skips dialect-specific ones (the MySQL FULLTEXT index) on other backends.
+            index.create(conn, checkfirst=True)
+    return len(_blogs_index_names(conn)) > len(existing)
+
+
+class MigrationError(RuntimeError):
+    """A step cannot run until the data is fixed by hand."""
+
+
+def _covers(entry: dict, columns: list[str]) -> bool:
+    return list(entry["column_names"]) == columns
+
+
+def create_blogs_title_constraint(conn) -> bool:
+    """uq_blogs_author_id_title, which create/update rely on to reject duplicate titles."""
+    columns = ["author_id", "title"]
+    inspector = inspect(conn)
+    if any(_covers(uq, columns) for uq in inspector.get_unique_constraints("blogs")) or any(
+        index["unique"] and _covers(index, columns) for index in inspector.get_indexes("blogs")
+    ):
+        return False
+
+    duplicates = conn.execute(
+        select(Blogs.author_id, Blogs.title, func.count(Blogs.id))
+        .group_by(Blogs.author_id, Blogs.title)
+        .having(func.count(Blogs.id) > 1)
+        .order_by(Blogs.author_id, Blogs.title)
+    ).all()
+    if duplicates:
+        listing = "\n".join(f"  author_id={row[0]} title={row[1]!r}: {row[2]} posts" for row in duplicates)
+        raise MigrationError(
+            f"Rename or delete the duplicate blog titles before adding uq_blogs_author_id_title:\n{listing}"
+        )
+
+    # A unique index rather than ALTER TABLE ADD CONSTRAINT, which SQLite lacks; all three
+    # backends report it by name (SQLite by its columns) just like the constraint.
+    conn.execute(text("CREATE UNIQUE INDEX uq_blogs_author_id_title ON blogs (author_id, title)"))
+    return True
+
+
+def create_search_index(conn) -> bool:
+    """The index SEARCH_BACKEND=auto queries: MySQL FULLTEXT or a populated SQLite FTS5 table."""
+    backend = conn.dialect.name
+    if backend == "sqlite":
+        if inspect(conn).has_table("blogs_fts"):
+            return False
+        for statement in BLOGS_FTS_DDL:
+            conn.execute(text(statement))
+        # External-content tables start empty; index the existing posts.
+        conn.execute(text("INSERT INTO blogs_fts(blogs_fts) VALUES ('rebuild')"))
+        return True
+
+    if backend in ("mysql", "mariadb"):
+        if "ix_blogs_title_description_fulltext" in _blogs_index_names(conn):
+            return False
+        conn.execute(text("CREATE FULLTEXT INDEX ix_blogs_title_description_fulltext ON blogs (title, description)"))
+        return True
+    return False
+
+
+STEPS = [
+    # First, so duplicate titles stop the run before anything else has changed.
+    ("blogs (author_id, title) unique constraint", create_blogs_title_constraint),
+    ("blogs.version column", add_blogs_version),
+    ("email_outbox table", create_table(EmailOutbox)),
+    ("revoked_tokens table", create_table(RevokedToken)),
+    ("blog search index", create_search_index),
+    ("author_stats table", create_author_stats),
+    ("blogs indexes", create_blogs_indexes),
+]
+
+
+def migrate(engine=None) -> list[str]:
+    """Runs every pending step and returns the names of those that changed the schema."""
+    applied = []
+    with (engine or get_engine()).begin() as conn:
+        for name, step in STEPS:
+            if step(conn):
+                applied.append(name)
+    return applied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+    try:
+        applied = migrate()
+    except MigrationError as exc:
+        raise SystemExit(str(exc))
+    print("\n".join(f"applied: {name}" for name in applied) or "schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,29 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, UniqueConstraint, DDL, event, literal_column, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
 from database import Base
 
 
+# SQLite stores CURRENT_TIMESTAMP without microseconds; keep bound values in the
+# same text format so keyset comparisons on created_date stay consistent.
+Timestamp = DateTime(timezone=True).with_variant(
+    SQLITE_DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Users(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String(100), unique=True, nullable=False)
-    email = Column(String(63), unique=True, nullable=False)
+    username = Column(String(100), nullable=False)
+    email = Column(String(63), nullable=False)
     password_hash = Column(String(255), nullable=False)
     role = Column(String(50), nullable=False)
 
@@ -24,6 +38,14 @@ class Users(Base):
     )
     blogs = relationship("Blogs", back_populates="author")
 
+    # Writes rely on these instead of checking first; routers map violations by name.
+    __table_args__ = (
+        UniqueConstraint("username", name="uq_users_username"),
+        UniqueConstraint("email", name="uq_users_email"),
+    )
+    # Fetch server-generated columns with RETURNING on flush where the backend supports it.
+    __mapper_args__ = {"eager_defaults": True}
+
 
 class Blogs(Base):
     __tablename__ = "blogs"
@@ -33,16 +55,104 @@ class Blogs(Base):
     description = Column(Text, nullable=False)
 
     created_date = Column(
-        DateTime(timezone=True),
+        Timestamp,
         server_default=func.now(),
         nullable=False
     )
 
     edit_date = Column(
-        DateTime(timezone=True),
+        Timestamp,
         onupdate=func.now(),
         nullable=True
     )
 
+    # Bumped on every UPDATE; timestamps alone are too coarse for validators.
+    version = Column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default=text("1"),
+        onupdate=literal_column("version") + 1,
+    )
+
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    author = relationship("Users", back_populates="blogs")
\ No newline at end of file
+    author = relationship("Users", back_populates="blogs")
+
+    __table_args__ = (
+        UniqueConstraint("author_id", "title", name="uq_blogs_author_id_title"),
+        Index("ix_blogs_created_date_id", "created_date", "id"),
+        Index("ix_blogs_author_id_created_date_id", "author_id", "created_date", "id"),
+        # Serves MAX(edit_date) per author when author_stats is refreshed.
+        Index("ix_blogs_author_id_edit_date", "author_id", "edit_date"),
+        Index("ix_blogs_title_description_fulltext", "title", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+
+# SQLite full-text index: an external-content FTS5 table kept in sync by triggers.
+BLOGS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts USING fts5(title, description, content='blogs', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS blogs_fts_ai AFTER INSERT ON blogs BEGIN "
+    "INSERT INTO blogs_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS blogs_fts_ad AFTER DELETE ON blogs BEGIN "
+    "INSERT INTO blogs_fts(blogs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS blogs_fts_au AFTER UPDATE OF title, description ON blogs BEGIN "
+    "INSERT INTO blogs_fts(blogs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO blogs_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+
+for statement in BLOGS_FTS_DDL:
+    event.listen(Blogs.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+for statement in ("DROP TRIGGER IF EXISTS blogs_fts_ai", "DROP TRIGGER IF EXISTS blogs_fts_ad",
+                  "DROP TRIGGER IF EXISTS blogs_fts_au", "DROP TABLE IF EXISTS blogs_fts"):
+    event.listen(Blogs.__table__, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+
+
+class AuthorStats(Base):
+    """Per-author blog summary kept current by blog_stats on every blog write."""
+
+    __tablename__ = "author_stats"
+
+    author_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    post_count = Column(Integer, nullable=False, default=0)
+    latest_created_date = Column(Timestamp, nullable=True)
+    latest_edit_date = Column(Timestamp, nullable=True)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    kind = Column(String(32), nullable=False)
+    dedupe_key = Column(String(255), nullable=True)
+
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    # Naive UTC, set in Python so coalescing windows compare consistently.
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    next_attempt_at = Column(DateTime, nullable=False, default=utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_email_outbox_dedupe_key_created_at", "dedupe_key", "created_at"),
+    )
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # A used or logged-out refresh-token jti, or "user:<id>:<nonce>" for a
+    # logout-everywhere cutoff that revokes every token the user was issued before it.
+    jti = Column(String(64), nullable=False, unique=True, index=True)
+    kind = Column(String(16), nullable=False, default="token")
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
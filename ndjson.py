@@ -0,0 +1,55 @@
+from typing import Any, AsyncIterator
+
+from fastapi import HTTPException, Request
+
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+MAX_LINE_BYTES = 1 << 20
+
+
+def is_ndjson(request: Request) -> bool:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type in NDJSON_MEDIA_TYPES
+
+
+async def iter_request_items(request: Request) -> AsyncIterator[Any]:
+    """Yields the items of a JSON array body, or the raw lines of an NDJSON body.
+
+    NDJSON lines are yielded as bytes without being decoded here, so callers can
+    hand them straight to a pydantic validate_json and keep memory flat.
+    """
+    if not is_ndjson(request):
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON body")
+        for item in body:
+            yield item
+        return
+
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > MAX_LINE_BYTES:
+            raise HTTPException(status_code=413, detail="NDJSON line too long")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def iter_chunks(items: AsyncIterator[Any], size: int) -> AsyncIterator[list[tuple[int, Any]]]:
+    chunk = []
+    index = 0
+    async for item in items:
+        chunk.append((index, item))
+        index += 1
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
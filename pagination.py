@@ -0,0 +1,38 @@
+import base64
+import json
+from datetime import datetime
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_date: datetime, row_id: int) -> str:
+    raw = json.dumps({"c": created_date.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["c"]), int(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], default: Iterable[str]) -> list[str]:
+    if not fields:
+        return list(default)
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if not selected:
+        raise HTTPException(status_code=400, detail="No fields selected")
+
+    return list(dict.fromkeys(selected))
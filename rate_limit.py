@@ -0,0 +1,147 @@
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from cache import TTLCache
+from settings import get_settings
+
+RATE_LIMIT_METRICS = {"allowed_total": 0, "limited_total": 0}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket holding ``capacity`` tokens that refills completely every ``period`` seconds."""
+
+    name: str
+    capacity: int
+    period: float
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "RateLimit":
+        count, _, seconds = spec.partition("/")
+        return cls(name, int(count), float(seconds or 60))
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+class MemoryRateLimitBackend:
+    """Per-process buckets in a bounded LRU; an evicted or expired bucket is simply full again."""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self._buckets = TTLCache(maxsize=maxsize or get_settings().rate_limit_size, ttl=60.0)
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        tokens, stamp = self._buckets.get(key) or (limit.capacity, now)
+        tokens = min(limit.capacity, tokens + (now - stamp) * limit.rate)
+
+        if tokens < 1:
+            retry_after = (1 - tokens) / limit.rate
+        else:
+            tokens -= 1
+            retry_after = 0.0
+
+        self._buckets.set(key, (tokens, now), ttl=(limit.capacity - tokens) / limit.rate)
+        return retry_after
+
+
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local stamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - stamp) * rate)
+
+local retry_after = 0
+if tokens < 1 then
+    retry_after = math.ceil((1 - tokens) / rate)
+else
+    tokens = tokens - 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+return retry_after
+"""
+
+
+class RedisRateLimitBackend:
+    """Shared buckets updated atomically by a Lua script, timed by the Redis clock."""
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        import redis.asyncio as redis
+
+        return cls(redis.Redis.from_url(url))
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        retry_after_ms = await self._script(keys=[f"ratelimit:{key}"], args=[limit.capacity, limit.rate / 1000])
+        return int(retry_after_ms) / 1000
+
+
+class RateLimiter:
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    async def enforce(self, *checks: tuple[RateLimit, str]) -> None:
+        """Consumes one token per (limit, key) in order and raises 429 at the first empty bucket."""
+        if not self.enabled:
+            return
+
+        for limit, key in checks:
+            retry_after = await self.backend.hit(f"{limit.name}:{key}", limit)
+            if retry_after > 0:
+                RATE_LIMIT_METRICS["limited_total"] += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many requests, please retry later",
+                    headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+                )
+        RATE_LIMIT_METRICS["allowed_total"] += 1
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    """Built on first use, so it follows the settings in effect by then."""
+    settings = get_settings()
+    if settings.rate_limit_backend == "redis":
+        if not settings.rate_limit_url:
+            raise RuntimeError("RATE_LIMIT_URL is missing in .env")
+        return RateLimiter(RedisRateLimitBackend.from_url(settings.rate_limit_url), settings.rate_limit_enabled)
+    return RateLimiter(MemoryRateLimitBackend(), settings.rate_limit_enabled)
+
+
+def client_ip(request: Request) -> str:
+    if get_settings().rate_limit_trust_forwarded:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def limit_login(request: Request, username: str) -> None:
+    settings = get_settings()
+    await get_rate_limiter().enforce(
+        (RateLimit.parse("login-ip", settings.rate_limit_login_ip), client_ip(request)),
+        (RateLimit.parse("login-user", settings.rate_limit_login_user), (username or "").strip().lower()),
+    )
+
+
+async def limit_register(request: Request) -> None:
+    limit = RateLimit.parse("register-ip", get_settings().rate_limit_register_ip)
+    await get_rate_limiter().enforce((limit, client_ip(request)))
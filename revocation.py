@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from database import AnySession, async_session_scope
+from models import RevokedToken, utcnow
+from security import REFRESH_TOKEN_EXPIRE_DAYS
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size set membership with no false negatives."""
+
+    def __init__(self, capacity: int, error_rate: Optional[float] = None):
+        if error_rate is None:
+            error_rate = get_settings().revocation_bloom_error_rate
+        self.capacity = capacity
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def _timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationStore:
+    """Refresh-token revocations: the revoked_tokens table fronted by an in-process bloom filter.
+
+    A miss in the filter (the common case) answers "not revoked" without a query;
+    only filter hits are confirmed against the indexed jti column. Unset arguments
+    follow REVOCATION_BLOOM_CAPACITY and REVOCATION_SYNC_INTERVAL.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, sync_interval: Optional[float] = None):
+        self._capacity = capacity
+        self._sync_interval = sync_interval
+        self._reset()
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def base_capacity(self) -> int:
+        return get_settings().revocation_bloom_capacity if self._capacity is None else self._capacity
+
+    @property
+    def sync_interval(self) -> float:
+        return get_settings().revocation_sync_interval if self._sync_interval is None else self._sync_interval
+
+    @property
+    def bloom(self) -> BloomFilter:
+        # Sized on first use rather than at import.
+        if self._bloom is None:
+            self._bloom = BloomFilter(self.base_capacity)
+        return self._bloom
+
+    def _reset(self, capacity: Optional[int] = None) -> None:
+        self._bloom = None if capacity is None else BloomFilter(capacity)
+        self._cutoffs: dict[int, float] = {}
+        self._last_id = 0
+        self._synced_at = float("-inf")
+
+    async def sync(self, db: AnySession) -> None:
+        rows = (await db.execute(
+            select(RevokedToken.id, RevokedToken.jti, RevokedToken.kind, RevokedToken.user_id, RevokedToken.revoked_at)
+            .where(RevokedToken.id > self._last_id)
+            .order_by(RevokedToken.id)
+        )).all()
+
+        for row in rows:
+            if row.kind == "user":
+                cutoff = _timestamp(row.revoked_at)
+                self._cutoffs[row.user_id] = max(self._cutoffs.get(row.user_id, cutoff), cutoff)
+            else:
+                self.bloom.add(row.jti)
+            self._last_id = row.id
+        self._synced_at = time.monotonic()
+
+    async def _sync_if_stale(self, db: AnySession) -> None:
+        if time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        async with self._lock:
+            if time.monotonic() - self._synced_at >= self.sync_interval:
+                await self.sync(db)
+
+    async def is_cut_off(self, db: AnySession, user_id: int, issued_at: int) -> bool:
+        await self._sync_if_stale(db)
+        # iat has one-second resolution, so tokens from the cutoff's own second are revoked too.
+        return issued_at <= self._cutoffs.get(user_id, float("-inf"))
+
+    async def is_revoked(self, db: AnySession, jti: str) -> bool:
+        await self._sync_if_stale(db)
+        if jti not in self.bloom:
+            return False
+        return await db.scalar(select(RevokedToken.id).where(RevokedToken.jti == jti)) is not None
+
+    async def revoke(self, db: AnySession, jti: str, user_id: int, expires_at: int) -> bool:
+        """Flushes a revocation for jti; False means it was already revoked (token reuse)."""
+        db.add(RevokedToken(
+            jti=jti,
+            user_id=user_id,
+            expires_at=datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None),
+        ))
+        try:
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            return False
+
+        self.bloom.add(jti)
+        return True
+
+    async def revoke_all(self, db: AnySession, user_id: int) -> None:
+        now = utcnow()
+        db.add(RevokedToken(
+            jti=f"user:{user_id}:{uuid.uuid4().hex[:16]}",
+            kind="user",
+            user_id=user_id,
+            revoked_at=now,
+            # Every token issued before the cutoff has expired by then.
+            expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        ))
+        await db.flush()
+        self._cutoffs[user_id] = _timestamp(now)
+
+    async def prune(self, db: AnySession) -> int:
+        result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < utcnow()))
+        await db.commit()
+
+        # Bloom filters cannot forget, so rebuild from the surviving rows, sized for growth.
+        async with self._lock:
+            self._reset(max(self.base_capacity, self.bloom.count * 2))
+            await self.sync(db)
+        return result.rowcount
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with async_session_scope() as db:
+                    pruned = await self.prune(db)
+                if pruned:
+                    logger.info("Pruned %s expired token revocations", pruned)
+            except Exception:
+                logger.exception("Token revocation pruning failed")
+            await asyncio.sleep(get_settings().revocation_prune_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._task = None
+
+
+revocation_store = RevocationStore()
@@ -1,15 +1,32 @@
-from fastapi import APIRouter, Depends, status, HTTPException, BackgroundTasks
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, status, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from typing import Annotated
-from jose.exceptions import ExpiredSignatureError
-from models import Users
-from schemas import LoginRequest, UserCreate, UserUpdateRequest
+from models import Blogs, Users
+from schemas import (
+    LoginRequest,
+    LoginResponse,
+    MeResponse,
+    MessageResponse,
+    RefreshResponse,
+    TokenResponse,
+    UserCreate,
+    UserOut,
+    UserResponse,
+    UserUpdateRequest,
+    UserUpdateResponse,
+    VerifyTokenResponse,
+)
 from datetime import datetime
-from jose import JWTError
-from dotenv import dotenv_values
-from database import db_dependency
-from email_service import send_welcome_email, send_login_message
-from security import hash_password, get_current_user, authenticate_user, create_access_token, create_refresh_token, decode_token, _now_ts, verify_password
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from database import async_db_dependency, async_read_db_dependency, violated_constraint
+from email_service import email_dispatcher, enqueue_login_message, enqueue_welcome_email
+from last_login import last_login_buffer
+from blog_cache import invalidate_author
+from rate_limit import limit_login, limit_register
+from revocation import revocation_store
+from security import Principal, hash_password_async, get_current_user, get_token_payload, get_refresh_payload, load_principal, authenticate_user, create_access_token, create_refresh_token, _now_ts, verify_password_async, invalidate_principal
 
 
 import pytz
@@ -20,61 +37,87 @@ router = APIRouter(
 )
 
 
-env = dotenv_values(".env")
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 REFRESH_TOKEN_EXPIRE_DAYS = 30  
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 TIMEZONE = pytz.timezone("Asia/Baku")
 
+REGISTER_CONFLICTS = {"uq_users_username": "This username exists", "uq_users_email": "This email exists"}
+UPDATE_CONFLICTS = {"uq_users_username": "This username already exists", "uq_users_email": "This email already exists"}
+
+
+async def _flush_user(db, conflicts: dict) -> None:
+    """Flushes pending user writes, turning unique violations into the matching 400."""
+    try:
+        await db.flush()
+    except IntegrityError as exc:
+        await db.rollback()
+        detail = conflicts.get(violated_constraint(exc, Users.__table__))
+        if detail is None:
+            raise
+        raise HTTPException(status_code=400, detail=detail)
+
+
+def _local_now() -> datetime:
+    # last_login is a naive column holding Baku wall time.
+    return datetime.now(TIMEZONE).replace(tzinfo=None)
 
-@router.get("/me")
-async def me(current_user: Annotated[Users, Depends(get_current_user)]):
+
+@router.get("/me", response_model=MeResponse)
+async def me(current_user: Annotated[Principal, Depends(get_current_user)], db: async_read_db_dependency):
+    # Principals built from token claims carry no last_login; the cached one does.
+    principal = await load_principal(db, current_user.id)
     return {
-        "id": current_user.id,
-        "username": current_user.username,
-        "is_active": getattr(current_user, "is_active", True),
-        "role": current_user.role
+        **asdict(principal),
+        "last_login": last_login_buffer.latest(principal.id, principal.last_login),
     }
 
-@router.patch("/update_me", status_code=status.HTTP_200_OK)
-def update_me(payload: UserUpdateRequest, db: db_dependency ,current_user: Users = Depends(get_current_user)):
+@router.patch("/update_me", status_code=status.HTTP_200_OK, response_model=UserUpdateResponse)
+async def update_me(payload: UserUpdateRequest, db: async_db_dependency, principal: Principal = Depends(get_current_user)):
+    current_user = await db.get(Users, principal.id)
+    if not current_user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    renamed = payload.username is not None and payload.username != current_user.username
     if payload.username is not None:
-        exists = db.query(Users).filter(Users.username == payload.username, Users.id != current_user.id).first()
-        if exists: raise HTTPException(status_code=400, detail="This username already exists")
         current_user.username = payload.username
 
     if payload.email is not None:
-        exists = db.query(Users).filter(Users.email == payload.email, Users.id != current_user.id).first()
-        if exists: raise HTTPException(status_code=400, detail="This email already exists")
         current_user.email = payload.email
 
     if payload.new_password is not None:
         if not payload.current_password:
             raise HTTPException(status_code=400,detail="current_password is required to change password")
 
-        if not verify_password(payload.current_password, current_user.password_hash):
+        if not await verify_password_async(payload.current_password, current_user.password_hash):
             raise HTTPException(status_code=401, detail="Current password is incorrect")
-        current_user.password_hash = hash_password(payload.new_password)
+        current_user.password_hash = await hash_password_async(payload.new_password)
 
     if (payload.username is None and payload.email is None and payload.new_password is None): 
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    db.commit()
-    db.refresh(current_user)
-
-    return {
-        "message": "User updated successfully",
-        "user": {
-            "id": current_user.id,
-            "username": current_user.username,
-            "email": getattr(current_user, "email", None),
-        },
-    }
-
-@router.post("/token")
-async def login_for_access_token(db: db_dependency, form_data: Annotated[OAuth2PasswordRequestForm, Depends()], background_tasks: BackgroundTasks):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    await _flush_user(db, UPDATE_CONFLICTS)
+    if renamed:
+        # Posts embed the author's name: bump their versions so listing and post ETags
+        # change, however many renames land within the same second. edit_date stays.
+        await db.execute(
+            update(Blogs)
+            .where(Blogs.author_id == current_user.id)
+            .values(version=Blogs.version + 1, edit_date=Blogs.edit_date)
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    invalidate_principal(current_user.id)
+    if renamed:
+        await invalidate_author(current_user.id)
+
+    return {"message": "User updated successfully", "user": current_user}
+
+@router.post("/token", response_model=TokenResponse)
+async def login_for_access_token(request: Request, db: async_db_dependency, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+    await limit_login(request, form_data.username)
+    user = await authenticate_user(db, form_data.username, form_data.password)
 
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials", headers={"WWW-Authenticate": "Bearer"})
@@ -82,104 +125,123 @@ async def login_for_access_token(db: db_dependency, form_data: Annotated[OAuth2P
     if hasattr(user, "is_active") and not user.is_active:
         raise HTTPException(status_code=403, detail="Account is inactive")
 
-    access_token = create_access_token(user.username)
-    refresh_token = create_refresh_token(user.username)
+    access_token = create_access_token(user.username, user.id, user.role)
+    refresh_token = create_refresh_token(user.username, user.id)
+    last_login_buffer.record(user.id, _local_now())
 
-    background_tasks.add_task(send_login_message, user.email, user.username)
+    if await enqueue_login_message(db, user.email, user.username):
+        await db.commit()
+        email_dispatcher.notify()
 
     return {
         "access_token": access_token,
         "refresh_token": refresh_token, 
         "token_type": "bearer",
         "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        "user": {"id": user.id, "username": user.username, "role": user.role}
+        "user": user,
     }
 
-@router.post("/refresh")
-async def refresh_access_token(db: db_dependency, refresh_token: str):
-    try:
-        payload = decode_token(refresh_token)
-        if payload.get("type") != "refresh":
-            raise HTTPException(status_code=401, detail="Invalid token type")
-
-        username = payload.get("sub")
-        if not username:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
+@router.post("/refresh", response_model=RefreshResponse)
+async def refresh_access_token(db: async_db_dependency, refresh_token: str):
+    payload = get_refresh_payload(refresh_token)
+    user_id = payload["uid"]
 
-    except ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Refresh token expired")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    if await revocation_store.is_cut_off(db, user_id, payload["iat"]):
+        raise HTTPException(status_code=401, detail="Refresh token revoked")
 
-    user = db.query(Users).filter(Users.username == username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if hasattr(user, "is_active") and not user.is_active:
+    user = await load_principal(db, user_id)
+    if not user.is_active:
         raise HTTPException(status_code=403, detail="Account is inactive")
 
-    new_access = create_access_token(user.username)
-    return {"access_token": new_access, "token_type": "bearer", "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60}
+    # Each refresh token is single-use: a second presentation means it leaked,
+    # so every session of that user is revoked.
+    if await revocation_store.is_revoked(db, payload["jti"]) or not await revocation_store.revoke(db, payload["jti"], user_id, payload["exp"]):
+        await revocation_store.revoke_all(db, user_id)
+        await db.commit()
+        raise HTTPException(status_code=401, detail="Refresh token reuse detected")
+
+    new_access = create_access_token(user.username, user.id, user.role)
+    new_refresh = create_refresh_token(user.username, user.id)
+    await db.commit()
+
+    return {
+        "access_token": new_access,
+        "refresh_token": new_refresh,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+@router.post("/logout", response_model=MessageResponse)
+async def logout(db: async_db_dependency, refresh_token: str):
+    payload = get_refresh_payload(refresh_token)
+    if await revocation_store.revoke(db, payload["jti"], payload["uid"], payload["exp"]):
+        await db.commit()
+    return {"message": "Logged out"}
 
 
-@router.get("/verify-token")
-async def verify_token(token: Annotated[str, Depends(oauth2_scheme)],db: db_dependency):
-    user = get_current_user(token, db)
+@router.post("/logout-all", response_model=MessageResponse)
+async def logout_everywhere(db: async_db_dependency, current_user: Annotated[Principal, Depends(get_current_user)]):
+    await revocation_store.revoke_all(db, current_user.id)
+    await db.commit()
+    return {"message": "Logged out of all sessions"}
 
-    payload = decode_token(token)
+
+@router.get("/verify-token", response_model=VerifyTokenResponse)
+async def verify_token(
+    user: Annotated[Principal, Depends(get_current_user)],
+    payload: Annotated[dict, Depends(get_token_payload)],
+):
     seconds_left = int(payload["exp"]) - _now_ts()
 
     return {
         "status": "valid",
-        "user": {"id": user.id, "username": user.username, "role": user.role},
+        "user": user,
         "time_left_seconds": max(seconds_left, 0),
     }
 
 
-@router.post("/login")
-async def login_json(db: db_dependency, body: LoginRequest):
-    user = authenticate_user(db, body.username, body.password_hash)
+@router.post("/login", response_model=LoginResponse)
+async def login_json(request: Request, db: async_db_dependency, body: LoginRequest):
+    await limit_login(request, body.username)
+    user = await authenticate_user(db, body.username, body.password_hash)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    access_token = create_access_token(user.username)
-    refresh_token = create_refresh_token(user.username)
-
+    access_token = create_access_token(user.username, user.id, user.role)
+    refresh_token = create_refresh_token(user.username, user.id)
+    last_login_buffer.record(user.id, _local_now())
 
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
-@router.patch("/last_login/{username}", status_code=status.HTTP_200_OK)
-async def update_last_login(username: str, db: db_dependency):
-    user = db.query(Users).filter(Users.username == username).first()
+@router.patch("/last_login/{username}", status_code=status.HTTP_200_OK, response_model=UserResponse)
+async def update_last_login(username: str, db: async_db_dependency):
+    user = await db.scalar(select(Users).where(Users.username == username))
     if not user: 
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.last_login = datetime.now(TIMEZONE)
-    db.commit()
-    db.refresh(user)
+    # Buffered and written in batches by last_login_buffer; the response shows the new value.
+    now = _local_now()
+    last_login_buffer.record(user.id, now)
+    out = UserOut.model_validate(user).model_copy(update={"last_login": now})
 
-    return {"message" : "Successful", "user" : user}
+    return {"message" : "Successful", "user" : out}
 
-@router.post("/register", status_code=status.HTTP_200_OK)
-async def register_user(credentials: UserCreate, db: db_dependency, background_tasks: BackgroundTasks):
-    user_exists = db.query(Users).filter(Users.username == credentials.username).first()
-    if user_exists: 
-        raise HTTPException(status_code=400, detail="This username exists")
-
-    email_exists = db.query(Users).filter(Users.email == credentials.email).first()
-    if email_exists: 
-        raise HTTPException(status_code=400, detail="This email exists")
-    
+@router.post("/register", status_code=status.HTTP_200_OK, response_model=UserResponse)
+async def register_user(request: Request, credentials: UserCreate, db: async_db_dependency):
+    await limit_register(request)
     user_data = credentials.dict()
-    user_data["password_hash"] = hash_password(user_data["password_hash"])
+    user_data["password_hash"] = await hash_password_async(user_data["password_hash"])
 
     user_data["role"] = "user"
     
     new_user = Users(**user_data)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    background_tasks.add_task(send_welcome_email, new_user.email, new_user.username)
+    enqueue_welcome_email(db, new_user.email, new_user.username)
+    await _flush_user(db, REGISTER_CONFLICTS)
+    await db.commit()
+
+    email_dispatcher.notify()
     return {"message" : "Successful", "user" : new_user}
 
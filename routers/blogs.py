@@ -1,37 +1,482 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from typing import Optional
 from models import Blogs, Users
-from schemas import BlogCreate, BlogUpdateRequest
-from database import db_dependency
-from security import get_current_user
+from schemas import (
+    BlogBulkDeleteRequest,
+    BlogCreate,
+    BlogDeleteResponse,
+    BlogDetail,
+    BlogPage,
+    BlogResponse,
+    BlogSearchPage,
+    BlogStatsResponse,
+    BlogUpdateRequest,
+    BulkResponse,
+    blog_bulk_update_adapter,
+    blog_create_adapter,
+    blog_detail_adapter,
+    blog_page_adapter,
+)
+from database import async_db_dependency, async_read_db_dependency, violated_constraint
+from security import Principal, get_current_user
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, parse_fields
+from search import on_blog_deleted, on_blog_saved, resolve_backend, search_blogs
+from http_cache import CachedResponse, accepts_encoding, make_etag, is_not_modified, not_modified
+from blog_cache import cached, cached_entry, cached_post, coalesce, invalidate_author, invalidate_blog, invalidate_blogs, list_cache_key
+from ndjson import iter_chunks, iter_request_items
+from export import EXPORT_MEDIA_TYPES, export_blogs
+from blog_stats import load_author_stats, update_author_stats
 
 router = APIRouter(prefix="/blogs", tags=["blogs"])
 
 
-@router.get("/all_blogs", status_code=status.HTTP_200_OK)
-def get_all_blogs(db: db_dependency, current_user: Users = Depends(get_current_user)):
-    
-    if current_user.role == "admin":
-        blogs = db.query(Blogs).order_by(Blogs.created_date.desc()).all()
-    else:
-        blogs = db.query(Blogs).filter(Blogs.author_id == current_user.id).order_by(Blogs.created_date.desc()).all()
+BLOG_LIST_FIELDS = ("id", "title", "description", "excerpt", "created_date", "edit_date", "author_id", "author_name")
+BLOG_LIST_DEFAULT_FIELDS = ("id", "title", "description", "created_date", "edit_date", "author_id", "author_name")
+EXCERPT_LENGTH = 200
+BULK_CHUNK_SIZE = 500
+BULK_MAX_ITEMS = 50_000
 
-    return [
-        {
-            "id": b.id,
-            "title": b.title,
-            "description": b.description,
-            "created_date": b.created_date,
-            "edit_date": b.edit_date,
-            "author_id": b.author_id,
-            "author_name": b.author.username
 
-        }
-        for b in blogs
-    ]
+async def _blog_page_validators(db, current_user: Principal, selected: list[str], limit: int, cursor: Optional[str]):
+    """(etag, last_modified) for a listing page from one aggregate over the caller's blogs."""
+    scope = select(
+        func.max(func.coalesce(Blogs.edit_date, Blogs.created_date)),
+        func.count(Blogs.id),
+        func.max(Blogs.id),
+        # Renames bump the author's posts too, so this also covers author_name.
+        func.sum(Blogs.version),
+    )
+    if current_user.role != "admin":
+        scope = scope.where(Blogs.author_id == current_user.id)
+    last_modified, total, max_id, versions = (await db.execute(scope)).one()
+
+    etag = make_etag(
+        "blogs", current_user.id, current_user.role, total, max_id, versions, limit, cursor, ",".join(selected)
+    )
+    return etag, last_modified
+
+
+async def _load_blog_page(
+    db, current_user: Principal, selected: list[str], limit: int, cursor: Optional[str], etag: str, last_modified
+) -> CachedResponse:
+    columns = {
+        "id": Blogs.id,
+        "title": Blogs.title,
+        "description": Blogs.description,
+        "excerpt": func.substr(Blogs.description, 1, EXCERPT_LENGTH).label("excerpt"),
+        "created_date": Blogs.created_date,
+        "edit_date": Blogs.edit_date,
+        "author_id": Blogs.author_id,
+        "author_name": Users.username.label("author_name"),
+    }
+    wanted = dict.fromkeys(["id", "created_date", *selected])
+
+    query = select(*(columns[f] for f in wanted))
+    if "author_name" in selected:
+        query = query.join(Users, Users.id == Blogs.author_id)
+    if current_user.role != "admin":
+        query = query.where(Blogs.author_id == current_user.id)
+
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                Blogs.created_date < cursor_date,
+                and_(Blogs.created_date == cursor_date, Blogs.id < cursor_id),
+            )
+        )
+
+    result = await db.execute(query.order_by(Blogs.created_date.desc(), Blogs.id.desc()).limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor(rows[-1].created_date, rows[-1].id) if has_more else None
+
+    # Validate and serialize the whole page in one pydantic-core call.
+    page = blog_page_adapter.validate_python({"items": rows, "next_cursor": next_cursor}, from_attributes=True)
+    body = blog_page_adapter.dump_json(page, include={"items": {"__all__": set(selected)}, "next_cursor": True})
+    return CachedResponse(body=body, etag=etag, last_modified=last_modified)
+
+
+@router.get("/all_blogs", status_code=status.HTTP_200_OK, response_model=BlogPage)
+async def get_all_blogs(
+    request: Request,
+    db: async_read_db_dependency,
+    current_user: Principal = Depends(get_current_user),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, BLOG_LIST_FIELDS, BLOG_LIST_DEFAULT_FIELDS)
+    if cursor:
+        decode_cursor(cursor)
+
+    key = await list_cache_key(current_user.role, current_user.id, limit, cursor or "", ",".join(selected))
+    entry = await cached_entry(key)
+    if entry is None:
+        # Answer a matching conditional request before the page query or any serialization.
+        # Coalesced too: for admins this aggregate scans every post.
+        etag, last_modified = await coalesce(
+            f"{key}:validators", lambda: _blog_page_validators(db, current_user, selected, limit, cursor)
+        )
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        entry = await cached(key, lambda: _load_blog_page(db, current_user, selected, limit, cursor, etag, last_modified))
+
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        return not_modified(entry.etag, entry.last_modified)
+    return entry.to_response(request)
+
+
+@router.get("/search", status_code=status.HTTP_200_OK, response_model=BlogSearchPage)
+async def search_blog_posts(
+    db: async_read_db_dependency,
+    current_user: Principal = Depends(get_current_user),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    author_id = None if current_user.role == "admin" else current_user.id
+    items, has_more = await search_blogs(db, q, author_id, limit, offset)
+
+    return {"items": items, "next_offset": offset + limit if has_more else None}
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_all_blogs(
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    after_id: int = Query(0, ge=0),
+):
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can export blogs",
+        )
+
+    gzip = accepts_encoding(request, "gzip")
+    headers = {"Content-Disposition": f'attachment; filename="blogs.{format}"', "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    # The generator opens its own session: it outlives the request's dependencies.
+    return StreamingResponse(export_blogs(format, after_id, gzip), media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+
+@router.get("/stats", status_code=status.HTTP_200_OK, response_model=BlogStatsResponse)
+async def get_blog_stats(db: async_read_db_dependency, current_user: Principal = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view blog stats",
+        )
+
+    # One row per author from author_stats; the blogs table is not scanned.
+    authors = await load_author_stats(db)
+    return {
+        "authors": authors,
+        "total_authors": len(authors),
+        "total_posts": sum(row.post_count for row in authors),
+        "latest_created_date": max((row.latest_created_date for row in authors if row.latest_created_date), default=None),
+        "latest_edit_date": max((row.latest_edit_date for row in authors if row.latest_edit_date), default=None),
+    }
+
+
+async def _flush_blog(db) -> None:
+    """Flushes a pending blog write; a duplicate (author_id, title) becomes the usual 400."""
+    try:
+        await db.flush()
+    except IntegrityError as exc:
+        await db.rollback()
+        if violated_constraint(exc, Blogs.__table__) != "uq_blogs_author_id_title":
+            raise
+        raise HTTPException(status_code=400, detail="This blog title exists")
+
+
+def _validate_item(adapter, raw):
+    return adapter.validate_json(raw) if isinstance(raw, bytes) else adapter.validate_python(raw)
+
+
+def _invalid(index: int, exc: ValidationError) -> dict:
+    error = exc.errors()[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return {"index": index, "status": "invalid", "detail": f"{location}: {error['msg']}" if location else error["msg"]}
+
+
+def _bulk_response(results: list[dict], ok_status: str) -> dict:
+    results.sort(key=lambda r: r["index"])
+    succeeded = sum(1 for r in results if r["status"] == ok_status)
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+def _index_saved(saved, author_id: int) -> None:
+    for blog_id, title, description in saved:
+        on_blog_saved(Blogs(id=blog_id, title=title, description=description, author_id=author_id))
+
+
+async def _write_chunk(db, statement, params) -> bool:
+    """Runs one chunk in a SAVEPOINT; False when a concurrent write took one of its titles."""
+    try:
+        async with db.begin_nested():
+            await db.execute(statement, params)
+    except IntegrityError as exc:
+        if violated_constraint(exc, Blogs.__table__) != "uq_blogs_author_id_title":
+            raise
+        return False
+    return True
+
 
+async def _bulk_items(request: Request):
+    # The whole stream is one transaction, so going over the limit rolls back every chunk before it.
+    async for chunk in iter_chunks(iter_request_items(request), BULK_CHUNK_SIZE):
+        if chunk[-1][0] >= BULK_MAX_ITEMS:
+            raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+        yield chunk
 
-@router.post("/create", status_code=status.HTTP_201_CREATED)
-def create_blog_post(create_data: BlogCreate, db: db_dependency,current_user: Users = Depends(get_current_user)):
+
+@router.post("/bulk", status_code=status.HTTP_200_OK, response_model=BulkResponse, response_model_exclude_none=True)
+async def bulk_create_blogs(request: Request, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
+    results, seen, saved, created = [], set(), [], 0
+    # Only the in-process search backend needs the text; other backends index in the database.
+    keep_text = resolve_backend() == "python"
+
+    async for chunk in _bulk_items(request):
+        pending = []
+        for index, raw in chunk:
+            try:
+                item = _validate_item(blog_create_adapter, raw)
+            except ValidationError as exc:
+                results.append(_invalid(index, exc))
+                continue
+
+            title, description = item.title.strip(), item.description.strip()
+            if not title:
+                results.append({"index": index, "status": "invalid", "detail": "Title cannot be empty"})
+            elif not description:
+                results.append({"index": index, "status": "invalid", "detail": "Description cannot be empty"})
+            elif title in seen:
+                results.append({"index": index, "status": "conflict", "detail": "This blog title exists"})
+            else:
+                seen.add(title)
+                pending.append((index, title, description))
+        if not pending:
+            continue
+
+        titles = [title for _, title, _ in pending]
+        existing = set((await db.scalars(
+            select(Blogs.title).where(Blogs.author_id == current_user.id, Blogs.title.in_(titles))
+        )).all())
+        rows = []
+        for index, title, description in pending:
+            if title in existing:
+                results.append({"index": index, "status": "conflict", "detail": "This blog title exists"})
+            else:
+                rows.append((index, title, description))
+        if not rows:
+            continue
+
+        if not await _write_chunk(db, insert(Blogs), [
+            {"title": title, "description": description, "author_id": current_user.id} for _, title, description in rows
+        ]):
+            results.extend({"index": index, "status": "conflict", "detail": "This blog title exists"} for index, _, _ in rows)
+            continue
+        # Titles are unique per author, so one query maps the new rows back to ids.
+        ids = dict((await db.execute(
+            select(Blogs.title, Blogs.id).where(Blogs.author_id == current_user.id, Blogs.title.in_([r[1] for r in rows]))
+        )).all())
+        for index, title, description in rows:
+            results.append({"index": index, "status": "created", "id": ids[title]})
+            if keep_text:
+                saved.append((ids[title], title, description))
+        created += len(rows)
+
+    if created:
+        await update_author_stats(db, current_user.id, created)
+        await db.commit()
+        _index_saved(saved, current_user.id)
+        await invalidate_author(current_user.id)
+
+    return _bulk_response(results, "created")
+
+
+@router.patch("/bulk", status_code=status.HTTP_200_OK, response_model=BulkResponse, response_model_exclude_none=True)
+async def bulk_update_blogs(request: Request, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
+    results, seen_ids, seen_titles, saved, updated = [], set(), set(), [], []
+    keep_text = resolve_backend() == "python"
+
+    async for chunk in _bulk_items(request):
+        items = []
+        for index, raw in chunk:
+            try:
+                items.append((index, _validate_item(blog_bulk_update_adapter, raw)))
+            except ValidationError as exc:
+                results.append(_invalid(index, exc))
+
+        current = {row.id: row for row in (await db.execute(
+            select(Blogs.id, Blogs.author_id, Blogs.title, Blogs.description).where(Blogs.id.in_([item.id for _, item in items]))
+        )).all()} if items else {}
+
+        pending = []
+        for index, item in items:
+            blog = current.get(item.id)
+            title = item.title.strip() if item.title is not None else None
+            description = item.description.strip() if item.description is not None else None
+
+            if blog is None:
+                results.append({"index": index, "status": "not_found", "id": item.id, "detail": "Blog not found"})
+            elif blog.author_id != current_user.id:
+                results.append({"index": index, "status": "forbidden", "id": item.id, "detail": "You are not allowed to edit this blog"})
+            elif item.id in seen_ids:
+                results.append({"index": index, "status": "conflict", "id": item.id, "detail": "Duplicate blog id in request"})
+            elif title is None and description is None:
+                results.append({"index": index, "status": "invalid", "id": item.id, "detail": "No fields to update"})
+            elif title == "":
+                results.append({"index": index, "status": "invalid", "id": item.id, "detail": "Title cannot be empty"})
+            elif description == "":
+                results.append({"index": index, "status": "invalid", "id": item.id, "detail": "Description cannot be empty"})
+            elif title is not None and title != blog.title and title in seen_titles:
+                results.append({"index": index, "status": "conflict", "id": item.id, "detail": "This blog title exists"})
+            else:
+                seen_ids.add(item.id)
+                if title is not None:
+                    seen_titles.add(title)
+                pending.append((index, item.id, title or blog.title, description or blog.description))
+
+        renamed = [title for _, blog_id, title, _ in pending if title != current[blog_id].title]
+        taken = dict((await db.execute(
+            select(Blogs.title, Blogs.id).where(Blogs.author_id == current_user.id, Blogs.title.in_(renamed))
+        )).all()) if renamed else {}
+
+        rows = []
+        for index, blog_id, title, description in pending:
+            if taken.get(title, blog_id) != blog_id:
+                results.append({"index": index, "status": "conflict", "id": blog_id, "detail": "This blog title exists"})
+            else:
+                rows.append((index, blog_id, title, description))
+        if not rows:
+            continue
+
+        if not await _write_chunk(db, update(Blogs), [
+            {"id": blog_id, "title": title, "description": description} for _, blog_id, title, description in rows
+        ]):
+            results.extend(
+                {"index": index, "status": "conflict", "id": blog_id, "detail": "This blog title exists"} for index, blog_id, _, _ in rows
+            )
+            continue
+        for index, blog_id, title, description in rows:
+            results.append({"index": index, "status": "updated", "id": blog_id})
+            updated.append(blog_id)
+            if keep_text:
+                saved.append((blog_id, title, description))
+
+    if updated:
+        await update_author_stats(db, current_user.id)
+        await db.commit()
+        _index_saved(saved, current_user.id)
+        await invalidate_blogs(current_user.id, updated)
+
+    return _bulk_response(results, "updated")
+
+
+@router.delete("/bulk", status_code=status.HTTP_200_OK, response_model=BulkResponse, response_model_exclude_none=True)
+async def bulk_delete_blogs(payload: BlogBulkDeleteRequest, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
+    if len(payload.ids) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+    results, deleted, seen = [], [], set()
+    for start in range(0, len(payload.ids), BULK_CHUNK_SIZE):
+        chunk = list(enumerate(payload.ids[start:start + BULK_CHUNK_SIZE], start))
+        owners = dict((await db.execute(
+            select(Blogs.id, Blogs.author_id).where(Blogs.id.in_([blog_id for _, blog_id in chunk]))
+        )).all())
+
+        owned = []
+        for index, blog_id in chunk:
+            if blog_id in seen:
+                results.append({"index": index, "status": "conflict", "id": blog_id, "detail": "Duplicate blog id in request"})
+            elif blog_id not in owners:
+                results.append({"index": index, "status": "not_found", "id": blog_id, "detail": "Blog not found"})
+            elif owners[blog_id] != current_user.id:
+                results.append({"index": index, "status": "forbidden", "id": blog_id, "detail": "You are not allowed to delete this blog"})
+            else:
+                seen.add(blog_id)
+                owned.append(blog_id)
+                results.append({"index": index, "status": "deleted", "id": blog_id})
+
+        if owned:
+            await db.execute(delete(Blogs).where(Blogs.id.in_(owned)))
+            deleted.extend(owned)
+
+    if deleted:
+        await update_author_stats(db, current_user.id, -len(deleted))
+    await db.commit()
+    for blog_id in deleted:
+        on_blog_deleted(blog_id)
+    if deleted:
+        await invalidate_blogs(current_user.id, deleted)
+
+    return _bulk_response(results, "deleted")
+
+
+async def _load_blog(db, blog_id: int) -> CachedResponse:
+    row = (await db.execute(
+        select(
+            Blogs.id,
+            Blogs.title,
+            Blogs.description,
+            Blogs.created_date,
+            Blogs.edit_date,
+            Blogs.author_id,
+            Blogs.version,
+            Users.username.label("author_name"),
+        )
+        .join(Users, Users.id == Blogs.author_id)
+        .where(Blogs.id == blog_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Blog not found")
+
+    body = blog_detail_adapter.dump_json(blog_detail_adapter.validate_python(row, from_attributes=True))
+    return CachedResponse(
+        body=body,
+        etag=make_etag("blog", blog_id, row.version, row.author_name),
+        last_modified=row.edit_date or row.created_date,
+        owner_id=row.author_id,
+    )
+
+
+@router.get("/{blog_id}", status_code=status.HTTP_200_OK, response_model=BlogDetail)
+async def get_blog(
+    blog_id: int,
+    request: Request,
+    db: async_read_db_dependency,
+    current_user: Principal = Depends(get_current_user),
+):
+    entry = await cached_post(
+        blog_id,
+        lambda: _load_blog(db, blog_id),
+        lambda: db.scalar(select(Blogs.author_id).where(Blogs.id == blog_id)),
+    )
+
+    if current_user.role != "admin" and entry.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to view this blog",
+        )
+
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        return not_modified(entry.etag, entry.last_modified)
+    return entry.to_response(request)
+
+
+@router.post("/create", status_code=status.HTTP_201_CREATED, response_model=BlogResponse)
+async def create_blog_post(create_data: BlogCreate, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
     title = (create_data.title or "").strip()
     description = (create_data.description or "").strip()
 
@@ -40,38 +485,28 @@ def create_blog_post(create_data: BlogCreate, db: db_dependency,current_user: Us
     if not description:
         raise HTTPException(status_code=400, detail="Description cannot be empty")
 
-    exist_blog = db.query(Blogs).filter(Blogs.author_id == current_user.id, Blogs.title == title).first()
-
-    if exist_blog:
-        raise HTTPException(status_code=400, detail="This blog title exists")
-
     new_blog = Blogs(
         title=title,
         description=description,
         author_id=current_user.id,
+        # Set explicitly so the response needs no reload of this never-defaulted column.
+        edit_date=None,
     )
 
     db.add(new_blog)
-    db.commit()
-    db.refresh(new_blog)
+    await _flush_blog(db)
+    await update_author_stats(db, current_user.id, 1)
+    await db.commit()
+    on_blog_saved(new_blog)
+    await invalidate_blog(new_blog.author_id)
 
-    return {
-        "message": "Blog created",
-        "blog": {
-            "id": new_blog.id,
-            "title": new_blog.title,
-            "description": new_blog.description,
-            "author_id": new_blog.author_id,
-            "created_date": new_blog.created_date,
-            "edit_date": new_blog.edit_date,
-        },
-    }
+    return {"message": "Blog created", "blog": new_blog}
 
 
-@router.patch("/edit/{blog_id}", status_code=status.HTTP_200_OK)
-def update_blog(blog_id: int, payload: BlogUpdateRequest,db: db_dependency, current_user: Users = Depends(get_current_user)):
+@router.patch("/edit/{blog_id}", status_code=status.HTTP_200_OK, response_model=BlogResponse)
+async def update_blog(blog_id: int, payload: BlogUpdateRequest, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
 
-    blog = db.query(Blogs).filter(Blogs.id == blog_id).first()
+    blog = await db.get(Blogs, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
 
@@ -89,10 +524,6 @@ def update_blog(blog_id: int, payload: BlogUpdateRequest,db: db_dependency, curr
         if not new_title:
             raise HTTPException(status_code=400, detail="Title cannot be empty")
 
-        exists = db.query(Blogs).filter(Blogs.author_id == current_user.id, Blogs.title == new_title, Blogs.id != blog_id).first()
-        if exists:
-            raise HTTPException(status_code=400, detail="This blog title exists")
-
         blog.title = new_title
 
     if payload.description is not None:
@@ -101,24 +532,17 @@ def update_blog(blog_id: int, payload: BlogUpdateRequest,db: db_dependency, curr
             raise HTTPException(status_code=400, detail="Description cannot be empty")
         blog.description = new_desc
 
-    db.commit()
-    db.refresh(blog)
+    await _flush_blog(db)
+    await update_author_stats(db, blog.author_id)
+    await db.commit()
+    on_blog_saved(blog)
+    await invalidate_blog(blog.author_id, blog.id)
 
-    return {
-        "message": "Blog updated successfully",
-        "blog": {
-            "id": blog.id,
-            "title": blog.title,
-            "description": blog.description,
-            "author_id": blog.author_id,
-            "created_date": blog.created_date,
-            "edit_date": blog.edit_date,
-        },
-    }
+    return {"message": "Blog updated successfully", "blog": blog}
 
-@router.delete("/{blog_id}", status_code=status.HTTP_200_OK)
-def delete_blog(blog_id: int, db: db_dependency, current_user: Users = Depends(get_current_user)):
-    blog = db.query(Blogs).filter(Blogs.id == blog_id).first()
+@router.delete("/{blog_id}", status_code=status.HTTP_200_OK, response_model=BlogDeleteResponse)
+async def delete_blog(blog_id: int, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
+    blog = await db.get(Blogs, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
 
@@ -128,7 +552,11 @@ def delete_blog(blog_id: int, db: db_dependency, current_user: Users = Depends(g
             detail="You are not allowed to delete this blog",
         )
 
-    db.delete(blog)
-    db.commit()
+    await db.delete(blog)
+    await db.flush()
+    await update_author_stats(db, blog.author_id, -1)
+    await db.commit()
+    on_blog_deleted(blog_id)
+    await invalidate_blog(blog.author_id, blog_id)
 
     return {"message": "Blog deleted successfully", "deleted_id": blog_id}
@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from database import pool_status
+from last_login import LAST_LOGIN_METRICS
+from metrics import register_collector, render_metrics, sample_lines
+from rate_limit import RATE_LIMIT_METRICS
+from security import HASH_METRICS
+
+router = APIRouter(tags=["metrics"])
+
+
+def _pool_lines():
+    lines = []
+    for key, help in (
+        ("connections_total", "Connections opened by the pool."),
+        ("checkouts_total", "Connection checkouts."),
+        ("checked_out", "Connections currently checked out."),
+        ("checkout_wait_seconds_total", "Time spent waiting for a connection."),
+        ("checkout_wait_seconds_max", "Longest wait for a connection."),
+        ("size", "Configured pool size."),
+        ("idle", "Idle pooled connections."),
+        ("overflow", "Connections open beyond pool_size."),
+    ):
+        samples = {(name,): stats[key] for name, stats in pool_status().items() if key in stats}
+        if samples:
+            lines.extend(sample_lines(f"db_pool_{key}", help, samples, ("pool",)))
+    return lines
+
+
+def _hash_lines():
+    return [
+        *sample_lines("password_hash_in_flight", "Password hash jobs running or queued.", {(): HASH_METRICS["in_flight"]}),
+        *sample_lines("password_hash_completed_total", "Password hash jobs completed.", {(): HASH_METRICS["completed_total"]}),
+        *sample_lines("password_hash_rejected_total", "Password hash jobs rejected with 503.", {(): HASH_METRICS["rejected_total"]}),
+        *sample_lines("password_hash_seconds_total", "Time spent hashing passwords.", {(): HASH_METRICS["latency_seconds_total"]}),
+    ]
+
+
+def _rate_limit_lines():
+    return [
+        *sample_lines("rate_limit_allowed_total", "Requests admitted by the auth rate limiter.", {(): RATE_LIMIT_METRICS["allowed_total"]}),
+        *sample_lines("rate_limit_limited_total", "Requests rejected with 429.", {(): RATE_LIMIT_METRICS["limited_total"]}),
+    ]
+
+
+def _last_login_lines():
+    return [
+        *sample_lines("last_login_pending", "Users with a buffered last_login update.", {(): LAST_LOGIN_METRICS["pending"]}),
+        *sample_lines("last_login_flushes_total", "Batched last_login flushes.", {(): LAST_LOGIN_METRICS["flushes_total"]}),
+        *sample_lines("last_login_rows_flushed_total", "Users updated by last_login flushes.", {(): LAST_LOGIN_METRICS["rows_flushed_total"]}),
+    ]
+
+
+register_collector(_pool_lines)
+register_collector(_hash_lines)
+register_collector(_rate_limit_lines)
+register_collector(_last_login_lines)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
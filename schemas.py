@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, TypeAdapter
+from datetime import datetime
 from typing import Optional
 
 
@@ -28,9 +29,161 @@ class BlogUpdateRequest(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
 
+class BlogBulkUpdateItem(BlogUpdateRequest):
+    id: int
 
+class BlogBulkDeleteRequest(BaseModel):
+    ids: list[int] = Field(min_length=1)
 
 
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
 
+    id: int
+    username: str
+    email: str
+    role: str
+    is_active: Optional[bool] = True
+    last_login: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class UserSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    email: Optional[str] = None
+
+class UserPublic(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    role: str
+
+class MeResponse(UserPublic):
+    is_active: bool = True
+    last_login: Optional[datetime] = None
+
+class UserResponse(BaseModel):
+    message: str
+    user: UserOut
+
+class UserUpdateResponse(BaseModel):
+    message: str
+    user: UserSummary
+
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+    expires_in: int
+    user: UserPublic
+
+class LoginResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+
+class RefreshResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+    expires_in: int
+
+class MessageResponse(BaseModel):
+    message: str
+
+class VerifyTokenResponse(BaseModel):
+    status: str
+    user: UserPublic
+    time_left_seconds: int
+
+
+class BlogOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    description: str
+    author_id: int
+    created_date: Optional[datetime] = None
+    edit_date: Optional[datetime] = None
+
+class BlogDetail(BlogOut):
+    author_name: str
+
+class BlogResponse(BaseModel):
+    message: str
+    blog: BlogOut
+
+class BlogDeleteResponse(BaseModel):
+    message: str
+    deleted_id: int
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[BulkItemResult]
+
+class BlogListItem(BaseModel):
+    """Projected listing row; fields not requested are left unset and dropped."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    excerpt: Optional[str] = None
+    created_date: Optional[datetime] = None
+    edit_date: Optional[datetime] = None
+    author_id: Optional[int] = None
+    author_name: Optional[str] = None
+
+class BlogPage(BaseModel):
+    items: list[BlogListItem]
+    next_cursor: Optional[str] = None
+
+class BlogSearchHit(BaseModel):
+    id: int
+    title: str
+    title_highlight: str
+    snippet: str
+    score: float
+    created_date: Optional[datetime] = None
+    edit_date: Optional[datetime] = None
+    author_id: int
+    author_name: str
+
+class BlogSearchPage(BaseModel):
+    items: list[BlogSearchHit]
+    next_offset: Optional[int] = None
+
+class AuthorStatsItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    author_id: int
+    author_name: str
+    post_count: int
+    latest_created_date: Optional[datetime] = None
+    latest_edit_date: Optional[datetime] = None
+
+class BlogStatsResponse(BaseModel):
+    authors: list[AuthorStatsItem]
+    total_authors: int
+    total_posts: int
+    latest_created_date: Optional[datetime] = None
+    latest_edit_date: Optional[datetime] = None
 
 
+blog_create_adapter = TypeAdapter(BlogCreate)
+blog_bulk_update_adapter = TypeAdapter(BlogBulkUpdateItem)
+blog_page_adapter = TypeAdapter(BlogPage)
+blog_detail_adapter = TypeAdapter(BlogDetail)
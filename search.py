@@ -0,0 +1,246 @@
+import heapq
+import html
+import math
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, column, func, literal, literal_column, or_, select, table
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import make_url
+
+from database import AnySession, database_url
+from models import Blogs, Users
+from settings import get_settings
+
+SNIPPET_WORDS = 24
+TITLE_WEIGHT = 3
+REBUILD_BATCH_SIZE = 5000
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token.lower() for token in TOKEN_RE.findall(text or "")]
+
+
+def resolve_backend() -> str:
+    backend = get_settings().search_backend
+    if backend != "auto":
+        return backend
+    return {"mysql": "fulltext", "mariadb": "fulltext", "sqlite": "fts5"}.get(
+        make_url(database_url()).get_backend_name(), "like"
+    )
+
+
+def highlight(text: str, terms: Iterable[str]) -> str:
+    terms = set(terms)
+    parts = []
+    last = 0
+    for m in TOKEN_RE.finditer(text):
+        if m.group().lower() in terms:
+            parts.append(html.escape(text[last:m.start()]))
+            parts.append(f"<mark>{html.escape(m.group())}</mark>")
+            last = m.end()
+    parts.append(html.escape(text[last:]))
+    return "".join(parts)
+
+
+def make_snippet(text: str, terms: Iterable[str], words: int = SNIPPET_WORDS) -> str:
+    terms = set(terms)
+    tokens = text.split()
+    first = next((i for i, tok in enumerate(tokens) if any(t in terms for t in tokenize(tok))), 0)
+    start = max(first - words // 3, 0)
+    window = " ".join(tokens[start:start + words])
+
+    snippet = highlight(window, terms)
+    if start > 0:
+        snippet = "…" + snippet
+    if start + words < len(tokens):
+        snippet += "…"
+    return snippet
+
+
+class InvertedIndex:
+    """In-memory BM25 index over blog titles and descriptions."""
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, int]] = {}
+        self._doc_terms: dict[int, Counter] = {}
+        self._doc_len: dict[int, int] = {}
+        self._doc_author: dict[int, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: int, title: str, description: str, author_id: int) -> None:
+        if doc_id in self._doc_len:
+            self.remove(doc_id)
+
+        counts = Counter(tokenize(description))
+        for term in tokenize(title):
+            counts[term] += TITLE_WEIGHT
+
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+        length = sum(counts.values())
+        self._doc_terms[doc_id] = counts
+        self._doc_len[doc_id] = length
+        self._doc_author[doc_id] = author_id
+        self._total_len += length
+
+    def remove(self, doc_id: int) -> None:
+        counts = self._doc_terms.pop(doc_id, None)
+        if counts is None:
+            return
+
+        for term in counts:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+        self._total_len -= self._doc_len.pop(doc_id)
+        self._doc_author.pop(doc_id, None)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def search(self, terms: Iterable[str], author_id: Optional[int] = None, limit: int = 20, offset: int = 0) -> list[tuple[int, float]]:
+        terms = list(dict.fromkeys(terms))
+        postings = [self._postings.get(term) for term in terms]
+        if not terms or not all(postings):
+            return []
+
+        n_docs = len(self._doc_len)
+        avg_len = self._total_len / n_docs
+        idf = [math.log(1 + (n_docs - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+
+        # Walk the rarest term's postings and probe the others (AND semantics).
+        order = sorted(range(len(terms)), key=lambda i: len(postings[i]))
+        rarest, rest = postings[order[0]], [postings[i] for i in order[1:]]
+
+        scored = []
+        for doc_id in rarest:
+            if author_id is not None and self._doc_author.get(doc_id) != author_id:
+                continue
+            if any(doc_id not in p for p in rest):
+                continue
+
+            norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+            score = 0.0
+            for weight, posting in zip(idf, postings):
+                tf = posting[doc_id]
+                score += weight * tf * (self.k1 + 1) / (tf + norm)
+            scored.append((score, doc_id))
+
+        top = heapq.nlargest(offset + limit, scored)
+        return [(doc_id, score) for score, doc_id in top[offset:]]
+
+
+search_index = InvertedIndex()
+
+
+def on_blog_saved(blog: Blogs) -> None:
+    if resolve_backend() == "python":
+        search_index.add(blog.id, blog.title, blog.description, blog.author_id)
+
+
+def on_blog_deleted(blog_id: int) -> None:
+    if resolve_backend() == "python":
+        search_index.remove(blog_id)
+
+
+async def rebuild_search_index(db: AnySession) -> int:
+    search_index.clear()
+    last_id = 0
+    while True:
+        rows = (await db.execute(
+            select(Blogs.id, Blogs.title, Blogs.description, Blogs.author_id)
+            .where(Blogs.id > last_id)
+            .order_by(Blogs.id)
+            .limit(REBUILD_BATCH_SIZE)
+        )).all()
+        if not rows:
+            return len(search_index)
+
+        for row in rows:
+            search_index.add(row.id, row.title, row.description, row.author_id)
+        last_id = rows[-1].id
+
+
+RESULT_COLUMNS = (
+    Blogs.id,
+    Blogs.title,
+    Blogs.description,
+    Blogs.created_date,
+    Blogs.edit_date,
+    Blogs.author_id,
+    Users.username.label("author_name"),
+)
+
+
+async def search_blogs(db: AnySession, query: str, author_id: Optional[int], limit: int, offset: int, backend: Optional[str] = None) -> tuple[list[dict], bool]:
+    terms = tokenize(query)
+    if not terms:
+        return [], False
+
+    backend = backend or resolve_backend()
+    if backend == "python":
+        hits = search_index.search(terms, author_id=author_id, limit=limit + 1, offset=offset)
+        scores = dict(hits)
+        rows = (await db.execute(
+            select(*RESULT_COLUMNS).join(Users, Users.id == Blogs.author_id).where(Blogs.id.in_(scores))
+        )).all() if scores else []
+        rows = sorted(((row, scores[row.id]) for row in rows), key=lambda item: -item[1])
+    else:
+        stmt = select(*RESULT_COLUMNS).join(Users, Users.id == Blogs.author_id)
+
+        if backend == "fts5":
+            fts = table("blogs_fts", column("rowid"))
+            rank = func.bm25(literal_column("blogs_fts"), float(TITLE_WEIGHT), 1.0)
+            fts_query = " ".join(f'"{term}"' for term in terms)
+            stmt = (
+                stmt.add_columns((-rank).label("score"))
+                .join(fts, fts.c.rowid == Blogs.id)
+                .where(literal_column("blogs_fts").op("MATCH")(fts_query))
+                .order_by(rank)
+            )
+        elif backend == "fulltext":
+            score = match(Blogs.title, Blogs.description, against=" ".join(terms)).in_natural_language_mode()
+            stmt = stmt.add_columns(score.label("score")).where(score > 0).order_by(score.desc())
+        else:
+            stmt = (
+                stmt.add_columns(literal(0.0).label("score"))
+                .where(and_(*(or_(Blogs.title.ilike(f"%{t}%"), Blogs.description.ilike(f"%{t}%")) for t in terms)))
+                .order_by(Blogs.created_date.desc(), Blogs.id.desc())
+            )
+
+        if author_id is not None:
+            stmt = stmt.where(Blogs.author_id == author_id)
+
+        result = await db.execute(stmt.limit(limit + 1).offset(offset))
+        rows = [(row, row.score) for row in result.all()]
+
+    has_more = len(rows) > limit
+    items = [
+        {
+            "id": row.id,
+            "title": row.title,
+            "title_highlight": highlight(row.title, terms),
+            "snippet": make_snippet(row.description, terms),
+            "score": round(float(score), 4),
+            "created_date": row.created_date,
+            "edit_date": row.edit_date,
+            "author_id": row.author_id,
+            "author_name": row.author_name,
+        }
+        for row, score in rows[:limit]
+    ]
+    return items, has_more
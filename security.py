@@ -1,30 +1,58 @@
+import asyncio
 import bcrypt
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from dotenv import dotenv_values
-from sqlalchemy.orm import Session
+from functools import lru_cache
+from sqlalchemy import select
 from jose import JWTError, jwt
 from typing import Annotated, Optional
 from fastapi import  Depends, HTTPException
 from fastapi.security import  OAuth2PasswordBearer
 from jose.exceptions import ExpiredSignatureError
-from database import  db_dependency
+from database import AnySession, async_read_db_dependency
 from models import Users
-
-env = dotenv_values(".env")
-
-SECRET_KEY = env["SECRET_KEY"]
-ALGORITHM = env["ALGORITHM"]
-
-if not SECRET_KEY: raise RuntimeError("SECRET_KEY is missing in .env")
-if not ALGORITHM: raise RuntimeError("ALGORITHM is missing in .env")
+from cache import TTLCache
+from settings import get_settings
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 REFRESH_TOKEN_EXPIRE_DAYS = 30  
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+
+def hash_workers() -> int:
+    return get_settings().hash_workers or os.cpu_count() or 2
+
+
+def hash_max_pending() -> int:
+    return get_settings().hash_max_pending or hash_workers() * 4
+
+@lru_cache(maxsize=1)
+def get_hash_pool():
+    """Built on first use, so a preloading parent (gunicorn preload_app) never owns one."""
+    if get_settings().hash_executor == "process":
+        return ProcessPoolExecutor(max_workers=hash_workers())
+    return ThreadPoolExecutor(max_workers=hash_workers(), thread_name_prefix="bcrypt")
+
+
+# An inherited pool shares the parent's call/result queues (or dead threads); drop it
+# in the child, without shutting it down, and let the child build its own.
+os.register_at_fork(after_in_child=get_hash_pool.cache_clear)
+
+HASH_METRICS = {
+    "in_flight": 0,
+    "completed_total": 0,
+    "rejected_total": 0,
+    "latency_seconds_total": 0.0,
+    "latency_seconds_max": 0.0,
+}
+
 def hash_password(password: str) -> str:
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=get_settings().bcrypt_rounds)
     hashed_password = bcrypt.hashpw(pwd_bytes, salt)
     return hashed_password.decode('utf-8')
 
@@ -33,11 +61,70 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    try:
+        return int(hashed_password.split("$")[2]) != get_settings().bcrypt_rounds
+    except (IndexError, ValueError):
+        return True
+
+async def _run_hash_job(fn, *args):
+    if HASH_METRICS["in_flight"] >= hash_max_pending():
+        HASH_METRICS["rejected_total"] += 1
+        raise HTTPException(status_code=503, detail="Server is busy, please retry", headers={"Retry-After": "1"})
+
+    HASH_METRICS["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_hash_pool(), fn, *args)
+    finally:
+        elapsed = time.perf_counter() - started
+        HASH_METRICS["in_flight"] -= 1
+        HASH_METRICS["completed_total"] += 1
+        HASH_METRICS["latency_seconds_total"] += elapsed
+        HASH_METRICS["latency_seconds_max"] = max(HASH_METRICS["latency_seconds_max"], elapsed)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash_job(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    role: str
+    is_active: bool = True
+    last_login: Optional[datetime] = None
+
+
+@lru_cache(maxsize=1)
+def get_principal_cache() -> TTLCache:
+    # Keyed by user id: usernames can be renamed away and then registered by someone else.
+    settings = get_settings()
+    return TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl)
+
+def invalidate_principal(*user_ids: Optional[int]) -> None:
+    cache = get_principal_cache()
+    for user_id in user_ids:
+        if user_id is not None:
+            cache.pop(user_id)
+
+
+@lru_cache(maxsize=1)
+def jwt_keys() -> tuple[str, str]:
+    """(key, algorithm), checked on first use so processes that issue no tokens need neither."""
+    settings = get_settings()
+    if not settings.secret_key: raise RuntimeError("SECRET_KEY is missing in .env")
+    if not settings.algorithm: raise RuntimeError("ALGORITHM is missing in .env")
+    return settings.secret_key, settings.algorithm
+
 
 def _now_ts() -> int:
     return int(datetime.now(timezone.utc).timestamp())
 
-def create_token(*, subject: str, token_type: str, expires_delta: timedelta) -> str:
+def create_token(*, subject: str, token_type: str, expires_delta: timedelta, claims: Optional[dict] = None) -> str:
     now = _now_ts()
     payload = {
         "sub": subject,
@@ -45,42 +132,57 @@ def create_token(*, subject: str, token_type: str, expires_delta: timedelta) ->
         "iat": now,
         "exp": now + int(expires_delta.total_seconds()),
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)    
+    if claims:
+        payload.update(claims)
+    key, algorithm = jwt_keys()
+    return jwt.encode(payload, key, algorithm=algorithm)
+
+def create_access_token(username: str, user_id: int, role: Optional[str] = None) -> str:
+    claims = {"uid": user_id}
+    if get_settings().token_embed_claims and role is not None:
+        claims["role"] = role
 
-def create_access_token(username: str) -> str:
     return create_token(
         subject=username,
         token_type="access",
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        claims=claims,
     )
 
-def create_refresh_token(username: str) -> str:
+def create_refresh_token(username: str, user_id: int) -> str:
     return create_token(
         subject=username,
         token_type="refresh",
         expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        claims={"uid": user_id, "jti": uuid.uuid4().hex},
     )
 
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    key, algorithm = jwt_keys()
+    return jwt.decode(token, key, algorithms=[algorithm])
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[Users]:
-    user = db.query(Users).filter(Users.username == username).first()
+async def authenticate_user(db: AnySession, username: str, password: str) -> Optional[Users]:
+    user = await db.scalar(select(Users).where(Users.username == username))
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
+
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(password)
+        await db.commit()
+
     return user
 
-def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: db_dependency,) -> Users:
+def get_token_payload(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
     try:
         payload = decode_token(token)
         if payload.get("type") != "access":
             raise HTTPException(status_code=401, detail="Invalid token type")
 
-        username = payload.get("sub")
-        if not username:
+        # Tokens issued without uid predate id-keyed principals and must log in again.
+        if not payload.get("sub") or payload.get("uid") is None:
             raise HTTPException(status_code=401, detail="Invalid token payload")
 
     except ExpiredSignatureError:
@@ -88,11 +190,47 @@ def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: db_depen
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(Users).filter(Users.username == username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    return payload
+
+def get_refresh_payload(token: str) -> dict:
+    try:
+        payload = decode_token(token)
+        if payload.get("type") != "refresh":
+            raise HTTPException(status_code=401, detail="Invalid token type")
+
+        # Tokens issued before rotation carry no jti/uid and must log in again.
+        if not payload.get("sub") or not payload.get("jti") or payload.get("uid") is None:
+            raise HTTPException(status_code=401, detail="Invalid token payload")
+
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Refresh token expired")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    return payload
+
+async def load_principal(db: AnySession, user_id: int) -> Principal:
+    principal = get_principal_cache().get(user_id)
+    if principal is None:
+        row = (await db.execute(
+            select(Users.id, Users.username, Users.role, Users.is_active, Users.last_login).where(Users.id == user_id)
+        )).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        principal = Principal(
+            id=row.id, username=row.username, role=row.role, is_active=row.is_active is not False, last_login=row.last_login
+        )
+        get_principal_cache().set(user_id, principal)
+
+    return principal
+
+async def get_current_user(payload: Annotated[dict, Depends(get_token_payload)], db: async_read_db_dependency) -> Principal:
+    if get_settings().token_embed_claims and "role" in payload:
+        return Principal(id=payload["uid"], username=payload["sub"], role=payload["role"])
 
-    if hasattr(user, "is_active") and not user.is_active:
+    principal = await load_principal(db, payload["uid"])
+    if not principal.is_active:
         raise HTTPException(status_code=403, detail="Account is inactive")
 
-    return user
\ No newline at end of file
+    return principal
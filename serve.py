@@ -0,0 +1,48 @@
+"""Production entry point: python serve.py
+
+Runs main:app under uvicorn with one worker process per CPU (WEB_WORKERS overrides),
+uvloop and httptools. On SIGTERM each worker stops accepting connections, waits up to
+GRACEFUL_SHUTDOWN_TIMEOUT seconds for in-flight requests and their background tasks,
+then runs the lifespan shutdown (outbox, last_login flush, pool disposal).
+
+Under gunicorn use gunicorn.conf.py instead; it applies the same settings.
+"""
+import os
+
+import uvicorn
+
+from settings import get_settings
+
+
+def default_workers() -> int:
+    # Honour CPU affinity / container cpusets where the platform exposes them.
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+def worker_count(settings) -> int:
+    workers = settings.web_workers or default_workers()
+    # Each process would keep its own index and miss the writes the others handle.
+    if settings.search_backend == "python" and workers > 1:
+        raise SystemExit(f"SEARCH_BACKEND=python is single-process; set WEB_WORKERS=1 (would start {workers} workers)")
+    return workers
+
+
+def main() -> None:
+    settings = get_settings()
+    uvicorn.run(
+        "main:app",
+        host=settings.web_host,
+        port=settings.web_port,
+        workers=worker_count(settings),
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        timeout_graceful_shutdown=settings.graceful_shutdown_timeout,
+        proxy_headers=settings.rate_limit_trust_forwarded,
+    )
+
+
+if __name__ == "__main__":
+    main()
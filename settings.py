@@ -0,0 +1,138 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal, Optional
+
+from dotenv import dotenv_values
+from pydantic import BaseModel, ConfigDict, field_validator
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+class Settings(BaseModel):
+    """Typed view of .env; fields map to upper-case variables (db_connection <- DB_CONNECTION)."""
+
+    model_config = ConfigDict(alias_generator=str.upper, frozen=True, extra="ignore")
+
+    # Checked when the engine, JWT keys or SMTP client are first built, not here,
+    # so processes that never touch them start without them.
+    db_connection: Optional[str] = None
+    secret_key: Optional[str] = None
+    algorithm: Optional[str] = None
+    smtp_host: Optional[str] = None
+    smtp_port: int = 587
+    smtp_user: Optional[str] = None
+    smtp_password: Optional[str] = None
+    smtp_from: Optional[str] = None
+    # Set SMTP_STARTTLS=false to point at a plain local server such as aiosmtpd.
+    smtp_starttls: bool = True
+    smtp_timeout: float = 30
+
+    db_async: bool = False
+    db_async_connection: Optional[str] = None
+    db_read_connection: Optional[str] = None
+    db_async_read_connection: Optional[str] = None
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Connections opened per engine at startup; defaults to DB_POOL_SIZE, 0 disables.
+    db_pool_warmup: Optional[int] = None
+
+    web_host: str = "0.0.0.0"
+    web_port: int = 8000
+    # Defaults to the number of CPUs this process may run on.
+    web_workers: Optional[int] = None
+    graceful_shutdown_timeout: float = 30
+
+    # Access tokens always carry uid; with TOKEN_EMBED_CLAIMS=true they also carry the
+    # role and skip the user lookup.
+    token_embed_claims: bool = False
+    principal_cache_ttl: float = 60
+    principal_cache_size: int = 10000
+    bcrypt_rounds: int = 12
+    hash_executor: Literal["thread", "process"] = "thread"
+    hash_workers: Optional[int] = None
+    hash_max_pending: Optional[int] = None
+
+    email_batch_size: int = 50
+    email_poll_interval: float = 5
+    email_max_attempts: int = 8
+    email_retry_base_seconds: float = 30
+    email_retry_max_seconds: float = 3600
+    login_notice_window: int = 3600
+
+    # "memory" is per process: with several workers (serve.py, gunicorn) a write only
+    # invalidates the worker that handled it, and the others serve their copy for up to
+    # RESPONSE_CACHE_TTL seconds. Use "redis" to share entries and invalidations.
+    response_cache_backend: Literal["memory", "redis", "none"] = "memory"
+    response_cache_url: Optional[str] = None
+    response_cache_ttl: float = 30
+    response_cache_size: int = 2048
+
+    # auto picks MySQL FULLTEXT or SQLite FTS5 from DB_CONNECTION; "python" keeps an
+    # in-process inverted index that the blog write hooks maintain incrementally. That
+    # index is per process, so "python" needs WEB_WORKERS=1; serve.py and gunicorn
+    # refuse to start more workers with it.
+    search_backend: Literal["auto", "fulltext", "fts5", "like", "python"] = "auto"
+
+    compression_enabled: bool = True
+    # Smaller bodies go out as-is: framing overhead and CPU outweigh the few bytes saved.
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    # Brotli quality 0-11; 4-5 compresses about as fast as gzip -6 and smaller.
+    compression_brotli_level: int = 4
+
+    rate_limit_enabled: bool = True
+    # "memory" keeps buckets per worker; "redis" shares them across workers and hosts.
+    rate_limit_backend: Literal["memory", "redis"] = "memory"
+    rate_limit_url: Optional[str] = None
+    rate_limit_size: int = 100000
+    # Only enable behind a proxy that overwrites X-Forwarded-For, or clients can pick their own key.
+    rate_limit_trust_forwarded: bool = False
+    rate_limit_login_ip: str = "30/60"
+    rate_limit_login_user: str = "5/60"
+    rate_limit_register_ip: str = "10/3600"
+
+    # Recorded logins reach the users table within this many seconds, which bounds how
+    # stale last_login can be in other workers (plus PRINCIPAL_CACHE_TTL for /auth/me).
+    last_login_flush_interval: float = 10
+    # Flush early once this many users are waiting.
+    last_login_max_pending: int = 10000
+
+    # Other workers' revocations become visible after at most this many seconds;
+    # rotation itself stays race-free through the unique jti constraint.
+    revocation_sync_interval: float = 5
+    revocation_prune_interval: float = 3600
+    revocation_bloom_capacity: int = 100000
+    revocation_bloom_error_rate: float = 0.001
+
+    metrics_enabled: bool = True
+    # Server-Timing exposes DB timings to clients, so it is off unless asked for.
+    server_timing: bool = False
+    slow_query_seconds: float = 0.5
+
+    @field_validator("hash_executor", "response_cache_backend", "search_backend", "rate_limit_backend", mode="before")
+    @classmethod
+    def _lower(cls, value):
+        return value.lower() if isinstance(value, str) else value
+
+
+def env_file() -> Path:
+    """ENV_FILE if set, else .env in the working directory, else the one next to this module."""
+    if os.environ.get("ENV_FILE"):
+        return Path(os.environ["ENV_FILE"])
+    cwd_env = Path.cwd() / ".env"
+    return cwd_env if cwd_env.is_file() else PROJECT_DIR / ".env"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Reads and validates .env once per process; the process environment overrides it."""
+    path = env_file()
+    values = dotenv_values(path) if path.is_file() else {}
+    names = {name.upper() for name in Settings.model_fields}
+    values.update((key, value) for key, value in os.environ.items() if key in names)
+    # An empty value (SMTP_USER=) means "use the default", as `env.get(...) or default` did.
+    return Settings.model_validate({key: value for key, value in values.items() if value not in (None, "")})
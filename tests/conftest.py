@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+import cache
+import database
+import email_service
+import rate_limit
+import security
+import settings
+from main import app
+from models import Users
+
+CACHED_BUILDERS = [
+    settings.get_settings,
+    database.get_engine,
+    database.get_read_engine,
+    database.get_async_engine,
+    database.get_async_read_engine,
+    database.session_factory,
+    cache.get_response_cache,
+    rate_limit.get_rate_limiter,
+    security.get_principal_cache,
+    security.jwt_keys,
+]
+
+ENV = {
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "DB_ASYNC": "true",
+    "BCRYPT_ROUNDS": "4",
+    "DB_POOL_WARMUP": "0",
+    "RATE_LIMIT_ENABLED": "false",
+}
+
+
+def reset_builders() -> None:
+    for builder in CACHED_BUILDERS:
+        builder.cache_clear()
+    email_service._recent_login_notices.clear()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """A fresh SQLite database on aiosqlite; override settings with monkeypatch.setenv before use."""
+    monkeypatch.setenv("ENV_FILE", str(tmp_path / "missing.env"))
+    monkeypatch.setenv("DB_CONNECTION", f"sqlite:///{tmp_path / 'app.db'}")
+    for key, value in ENV.items():
+        monkeypatch.setenv(key, value)
+    reset_builders()
+    yield monkeypatch
+    reset_builders()
+
+
+@pytest.fixture
+def client(env):
+    database.Base.metadata.create_all(database.get_engine())
+    with TestClient(app) as client:
+        yield client
+
+
+def register(client, username: str, password: str = "secret123") -> dict:
+    """Registers `username` and returns bearer headers for them."""
+    client.post(
+        "/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password_hash": password},
+    )
+    token = client.post("/auth/token", data={"username": username, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_admin(username: str) -> None:
+    with database.get_engine().begin() as conn:
+        conn.execute(update(Users).where(Users.username == username).values(role="admin"))
+    security.get_principal_cache().clear()
@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+
+import database
+from main import app
+from models import Blogs
+from routers import blogs
+from tests.conftest import register
+
+
+@pytest.fixture(params=["true", "false"], ids=["async", "sync"])
+def mode_client(request, env):
+    env.setenv("DB_ASYNC", request.param)
+    env.setattr(blogs, "BULK_CHUNK_SIZE", 2)
+    database.Base.metadata.create_all(database.get_engine())
+    with TestClient(app) as client:
+        yield client
+
+
+def titles() -> list[str]:
+    with database.get_engine().connect() as conn:
+        return list(conn.scalars(select(Blogs.title).order_by(Blogs.id)))
+
+
+def items(*names: str) -> list[dict]:
+    return [{"title": name, "description": "d"} for name in names]
+
+
+def test_over_the_limit_commits_nothing(mode_client, env):
+    env.setattr(blogs, "BULK_MAX_ITEMS", 3)
+    headers = register(mode_client, "alice")
+
+    response = mode_client.post("/blogs/bulk", json=items("a", "b", "c", "d"), headers=headers)
+    assert response.status_code == 413
+    assert titles() == []
+    assert mode_client.get("/blogs/all_blogs", headers=headers).json()["items"] == []
+
+
+def test_a_concurrent_duplicate_rolls_back_its_chunk_only(mode_client):
+    headers = register(mode_client, "alice")
+    author_id = mode_client.get("/auth/me", headers=headers).json()["id"]
+    engine = database.get_async_engine().sync_engine if database.db_async() else database.get_engine()
+
+    raced = []
+
+    # Another request creates "b" after the first chunk has checked its titles.
+    def race(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT blogs.title") and not raced:
+            raced.append(statement)
+            with database.get_engine().begin() as other:
+                other.execute(insert(Blogs).values(title="b", description="theirs", author_id=author_id))
+
+    event.listen(engine, "after_cursor_execute", race)
+    try:
+        response = mode_client.post("/blogs/bulk", json=items("a", "b", "c", "d"), headers=headers)
+    finally:
+        event.remove(engine, "after_cursor_execute", race)
+
+    assert response.status_code == 200
+    assert [(r["index"], r["status"]) for r in response.json()["results"]] == [
+        (0, "conflict"), (1, "conflict"), (2, "created"), (3, "created"),
+    ]
+    assert titles() == ["b", "c", "d"]
@@ -0,0 +1,127 @@
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+import database
+import email_service
+from database import async_session_scope
+from email_service import EmailDispatcher, enqueue_email, enqueue_login_message, retry_delay
+from main import app
+from models import EmailOutbox
+from settings import get_settings
+from tests.conftest import register
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_env(env):
+    env.setenv("SMTP_HOST", "127.0.0.1")
+    env.setenv("SMTP_STARTTLS", "false")
+    env.setenv("SMTP_FROM", "noreply@example.com")
+    env.setenv("SMTP_TIMEOUT", "5")
+    return env
+
+
+@pytest.fixture
+def inbox(smtp_env):
+    inbox = Inbox()
+    port = free_port()
+    controller = Controller(inbox, hostname="127.0.0.1", port=port)
+    controller.start()
+    smtp_env.setenv("SMTP_PORT", str(port))
+    yield inbox
+    controller.stop()
+
+
+@pytest.fixture
+async def outbox_db(env):
+    database.Base.metadata.create_all(database.get_engine())
+    yield
+    await database.dispose_engines()
+
+
+async def load_outbox():
+    async with async_session_scope() as db:
+        return (await db.scalars(select(EmailOutbox).order_by(EmailOutbox.id))).all()
+
+
+def test_register_and_login_mail_goes_out_through_the_outbox(inbox):
+    database.Base.metadata.create_all(database.get_engine())
+    # Leaving the client runs the shutdown, which drains the outbox.
+    with TestClient(app) as client:
+        register(client, "alice")
+        for _ in range(3):
+            client.post("/auth/token", data={"username": "alice", "password": "secret123"})
+
+    bodies = [message.content.decode() for message in inbox.messages]
+    assert len(bodies) == 2  # welcome plus one coalesced login notice
+    assert all(message.rcpt_tos == ["alice@example.com"] for message in inbox.messages)
+    assert any("Subject: Welcome to our system" in body for body in bodies)
+    assert any("Subject: Logging In" in body for body in bodies)
+
+
+@pytest.mark.anyio
+async def test_login_notices_are_coalesced_per_window(outbox_db):
+    async with async_session_scope() as db:
+        assert await enqueue_login_message(db, "a@example.com", "alice")
+        await db.commit()
+        assert not await enqueue_login_message(db, "a@example.com", "alice")
+
+        # Another worker has not seen the notice, but the outbox row still dedupes it.
+        email_service._recent_login_notices.clear()
+        assert not await enqueue_login_message(db, "a@example.com", "alice")
+        assert await enqueue_login_message(db, "b@example.com", "bob")
+        await db.commit()
+
+    assert [row.dedupe_key for row in await load_outbox()] == ["login:alice", "login:bob"]
+
+
+@pytest.mark.anyio
+async def test_failed_sends_back_off_then_give_up(smtp_env, outbox_db):
+    smtp_env.setenv("SMTP_PORT", str(free_port()))
+    smtp_env.setenv("EMAIL_MAX_ATTEMPTS", "2")
+    get_settings.cache_clear()
+    async with async_session_scope() as db:
+        enqueue_email(db, "a@example.com", "s", "b", kind="welcome")
+        await db.commit()
+
+    dispatcher = EmailDispatcher()
+    assert await dispatcher.dispatch_once() == 1
+    [row] = await load_outbox()
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert row.next_attempt_at > row.created_at
+    assert row.last_error
+
+    # Not due yet, so the next pass leaves it alone.
+    assert await dispatcher.dispatch_once() == 0
+
+    async with async_session_scope() as db:
+        await db.execute(update(EmailOutbox).values(next_attempt_at=row.created_at))
+        await db.commit()
+    assert await dispatcher.dispatch_once() == 1
+    [row] = await load_outbox()
+    assert (row.status, row.attempts) == ("failed", 2)
+
+
+def test_retry_delay_doubles_up_to_the_cap(env):
+    env.setenv("EMAIL_RETRY_BASE_SECONDS", "30")
+    env.setenv("EMAIL_RETRY_MAX_SECONDS", "100")
+    get_settings.cache_clear()
+    assert [retry_delay(n) for n in (1, 2, 3, 4)] == [30, 60, 100, 100]
@@ -0,0 +1,23 @@
+import csv
+import io
+
+from tests.conftest import make_admin, register
+
+
+def test_resumed_csv_appends_without_a_second_header(client):
+    headers = register(client, "admin")
+    for i in range(4):
+        client.post("/blogs/create", json={"title": f"post {i}", "description": "d"}, headers=headers)
+    make_admin("admin")
+    client.get("/auth/me", headers=headers)
+
+    first = client.get("/blogs/export?format=csv", headers=headers).text
+    lines = first.splitlines(keepends=True)
+    # The download broke off after the first two posts.
+    partial = "".join(lines[:3])
+    last_id = list(csv.reader(io.StringIO(partial)))[-1][0]
+    resumed = client.get(f"/blogs/export?format=csv&after_id={last_id}", headers=headers).text
+
+    assert partial + resumed == first
+    rows = list(csv.DictReader(io.StringIO(partial + resumed)))
+    assert [row["id"] for row in rows] == ["1", "2", "3", "4"]
@@ -0,0 +1,43 @@
+from tests.conftest import make_admin, register
+
+
+def test_renames_within_one_second_change_the_etags(client):
+    admin = register(client, "admin")
+    alice = register(client, "alice")
+    client.post("/blogs/create", json={"title": "post", "description": "d"}, headers=alice)
+    make_admin("admin")
+
+    listing = client.get("/blogs/all_blogs", headers=admin)
+    post = client.get("/blogs/1", headers=admin)
+    for name in ("alice2", "alice3"):
+        assert client.patch("/auth/update_me", json={"username": name}, headers=alice).status_code == 200
+
+        fresh = client.get("/blogs/all_blogs", headers={**admin, "If-None-Match": listing.headers["etag"]})
+        assert fresh.status_code == 200
+        assert fresh.json()["items"][0]["author_name"] == name
+        listing = fresh
+
+        fresh = client.get("/blogs/1", headers={**admin, "If-None-Match": post.headers["etag"]})
+        assert (fresh.status_code, fresh.json()["author_name"]) == (200, name)
+        post = fresh
+
+    # A rename keeps the post's own edit date.
+    assert post.json()["edit_date"] is None
+
+
+def test_every_variant_of_a_compressible_url_varies_on_accept_encoding(client):
+    headers = register(client, "alice")
+    # Large enough to clear the default compression threshold.
+    client.post("/blogs/create", json={"title": "post", "description": "d" * 2000}, headers=headers)
+
+    for url in ("/blogs/all_blogs", "/blogs/1"):
+        for coding in ("identity", "gzip", "br"):
+            response = client.get(url, headers={**headers, "Accept-Encoding": coding})
+            assert response.headers["vary"] == "Accept-Encoding", (url, coding)
+            assert response.headers.get("content-encoding", "identity") == coding, (url, coding)
+            if "etag" in response.headers:
+                again = client.get(url, headers={**headers, "Accept-Encoding": coding, "If-None-Match": response.headers["etag"]})
+                assert (again.status_code, again.headers["vary"]) == (304, "Accept-Encoding"), (url, coding)
+
+    # Routes without validators vary too, even when this client gets identity.
+    assert client.get("/auth/me", headers={**headers, "Accept-Encoding": "identity"}).headers["vary"] == "Accept-Encoding"
@@ -0,0 +1,63 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import database
+from main import app
+from migrate import MigrationError, migrate
+from tests.conftest import register
+
+# The users and blogs tables as the first release created them.
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(100) NOT NULL UNIQUE, "
+    "email VARCHAR(63) NOT NULL UNIQUE, password_hash VARCHAR(255) NOT NULL, role VARCHAR(50) NOT NULL, "
+    "is_active BOOLEAN, last_login DATETIME, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, "
+    "updated_at DATETIME DEFAULT CURRENT_TIMESTAMP)",
+    "CREATE TABLE blogs (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, description TEXT NOT NULL, "
+    "created_date DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, edit_date DATETIME, "
+    "author_id INTEGER NOT NULL REFERENCES users(id))",
+]
+
+
+@pytest.fixture
+def legacy_db(env):
+    with database.get_engine().begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+    return database.get_engine()
+
+
+def test_fresh_schema_needs_nothing(env):
+    database.Base.metadata.create_all(database.get_engine())
+    assert migrate() == []
+
+
+def test_legacy_schema_gets_duplicate_title_protection(legacy_db):
+    assert "blogs (author_id, title) unique constraint" in migrate()
+    assert migrate() == []
+
+    with TestClient(app) as client:
+        headers = register(client, "alice")
+        first = client.post("/blogs/create", json={"title": "dup", "description": "d"}, headers=headers)
+        assert first.status_code == 201
+        again = client.post("/blogs/create", json={"title": "dup", "description": "d"}, headers=headers)
+        assert (again.status_code, again.json()["detail"]) == (400, "This blog title exists")
+
+        other = client.post("/blogs/create", json={"title": "other", "description": "d"}, headers=headers).json()
+        renamed = client.patch(f"/blogs/edit/{other['blog']['id']}", json={"title": "dup"}, headers=headers)
+        assert (renamed.status_code, renamed.json()["detail"]) == (400, "This blog title exists")
+
+
+def test_duplicate_titles_stop_the_migration_untouched(legacy_db):
+    with legacy_db.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, username, email, password_hash, role) VALUES (1, 'a', 'a@x', 'h', 'user')"))
+        conn.execute(text("INSERT INTO blogs (title, description, author_id) VALUES ('t', 'd', 1), ('t', 'd', 1)"))
+
+    with pytest.raises(MigrationError, match="author_id=1 title='t': 2 posts"):
+        migrate()
+    with legacy_db.connect() as conn:
+        assert "version" not in {row[1] for row in conn.execute(text("PRAGMA table_info(blogs)"))}
+
+    with legacy_db.begin() as conn:
+        conn.execute(text("UPDATE blogs SET title = 't2' WHERE id = 2"))
+    assert "blogs (author_id, title) unique constraint" in migrate()
@@ -0,0 +1,100 @@
+"""Pins the SQL statement count of the hot read paths so N+1 regressions fail loudly."""
+import asyncio
+
+import httpx
+import pytest
+
+from database import assert_max_queries, count_queries
+from main import app
+from tests.conftest import make_admin, register
+
+# Validators (one aggregate over blogs) plus the page itself.
+LIST_QUERIES = 2
+# The post joined to its author's name.
+POST_QUERIES = 1
+
+
+@pytest.fixture
+def uncached(env):
+    env.setenv("RESPONSE_CACHE_BACKEND", "none")
+
+
+def write_posts(client, headers, count: int) -> None:
+    for i in range(count):
+        client.post("/blogs/create", json={"title": f"post {i}", "description": f"body {i}"}, headers=headers)
+
+
+def test_listing_query_count_does_not_grow_with_posts_or_authors(uncached, client):
+    admin = register(client, "admin")
+    for name in ("alice", "bob", "carol"):
+        write_posts(client, register(client, name), 4)
+    make_admin("admin")
+    client.get("/auth/me", headers=admin)
+
+    for url in ("/blogs/all_blogs", "/blogs/all_blogs?limit=5", "/blogs/all_blogs?fields=id,author_name,excerpt"):
+        with count_queries() as statements:
+            response = client.get(url, headers=admin)
+        assert response.status_code == 200
+        assert len(statements) == LIST_QUERIES, statements
+
+    cursor = client.get("/blogs/all_blogs?limit=5", headers=admin).json()["next_cursor"]
+    with assert_max_queries(LIST_QUERIES):
+        assert client.get(f"/blogs/all_blogs?limit=5&cursor={cursor}", headers=admin).status_code == 200
+
+
+def test_get_blog_query_count(uncached, client):
+    headers = register(client, "alice")
+    write_posts(client, headers, 3)
+
+    with count_queries() as statements:
+        response = client.get("/blogs/2", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["author_name"] == "alice"
+    assert len(statements) == POST_QUERIES, statements
+
+
+def test_not_modified_listing_skips_the_page_query(uncached, client):
+    headers = register(client, "alice")
+    write_posts(client, headers, 3)
+    etag = client.get("/blogs/all_blogs", headers=headers).headers["etag"]
+
+    with count_queries() as statements:
+        response = client.get("/blogs/all_blogs", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert len(statements) == LIST_QUERIES - 1
+
+
+def test_cached_reads_run_no_queries(client):
+    headers = register(client, "alice")
+    write_posts(client, headers, 3)
+
+    client.get("/blogs/all_blogs", headers=headers)
+    with assert_max_queries(0):
+        assert client.get("/blogs/all_blogs", headers=headers).status_code == 200
+
+    # A miss looks up the post's author once, then fills the entry keyed on its versions.
+    for expected in (POST_QUERIES + 1, 0, 0):
+        with count_queries() as statements:
+            assert client.get("/blogs/1", headers=headers).status_code == 200
+        assert len(statements) == expected, statements
+
+
+def test_concurrent_cold_reads_query_once(client):
+    headers = register(client, "alice")
+    write_posts(client, headers, 3)
+
+    async def burst(url: str) -> list[int]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            responses = await asyncio.gather(*(http.get(url, headers=headers) for _ in range(50)))
+        return [response.status_code for response in responses]
+
+    # Validators once, then the page once.
+    with count_queries() as statements:
+        assert client.portal.call(burst, "/blogs/all_blogs") == [200] * 50
+    assert len(statements) == LIST_QUERIES, statements
+
+    # The author lookup once, then the post once.
+    with count_queries() as statements:
+        assert client.portal.call(burst, "/blogs/2") == [200] * 50
+    assert len(statements) == POST_QUERIES + 1, statements
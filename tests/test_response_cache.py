@@ -0,0 +1,106 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from blog_cache import ADMIN_NAMESPACE, author_namespace
+from cache import MemoryBackend, RedisBackend, ResponseCache, get_response_cache
+from tests.conftest import register
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryBackend(maxsize=16, ttl=30)
+    return RedisBackend(fakeredis.FakeAsyncRedis(), ttl=30)
+
+
+async def _versions(cache, *namespaces):
+    return [await cache.version(namespace) for namespace in namespaces]
+
+
+async def test_get_set_roundtrip(backend):
+    cache = ResponseCache(backend)
+    assert await cache.get("k") is None
+    await cache.set("k", b"value")
+    assert await cache.get("k") == b"value"
+
+
+async def test_bump_changes_only_its_namespace(backend):
+    cache = ResponseCache(backend)
+    first, other = await cache.version("ns:a"), await cache.version("ns:b")
+    assert await cache.version("ns:a") == first
+
+    await cache.bump("ns:a")
+    assert await cache.version("ns:a") != first
+    assert await cache.version("ns:b") == other
+
+
+async def test_concurrent_misses_load_once(backend):
+    cache = ResponseCache(backend)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"page"
+
+    results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(50)))
+    assert results == [b"page"] * 50
+    assert calls == 1
+    assert await cache.get_or_load("k", loader) == b"page"
+    assert calls == 1
+
+
+async def test_failed_load_is_not_cached():
+    cache = ResponseCache(MemoryBackend())
+
+    async def failing():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("k", failing)
+    assert await cache.get("k") is None
+
+
+async def test_without_backend_every_call_loads():
+    cache = ResponseCache(None)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return b"page"
+
+    await cache.get_or_load("k", loader)
+    await cache.get_or_load("k", loader)
+    assert len(calls) == 2
+    assert await cache.version("ns") == 0
+
+
+def test_writes_invalidate_the_author_and_admin_listings(client):
+    alice, bob = register(client, "alice"), register(client, "bob")
+    client.post("/blogs/create", json={"title": "first", "description": "d"}, headers=alice)
+    assert [b["title"] for b in client.get("/blogs/all_blogs", headers=alice).json()["items"]] == ["first"]
+    assert client.get("/blogs/all_blogs", headers=bob).json()["items"] == []
+
+    cache = get_response_cache()
+    versions = asyncio.run(_versions(cache, ADMIN_NAMESPACE, author_namespace(1), author_namespace(2)))
+    client.post("/blogs/create", json={"title": "second", "description": "d"}, headers=alice)
+    admin, alice_version, bob_version = asyncio.run(_versions(cache, ADMIN_NAMESPACE, author_namespace(1), author_namespace(2)))
+
+    assert admin != versions[0] and alice_version != versions[1]
+    assert bob_version == versions[2]
+    assert [b["title"] for b in client.get("/blogs/all_blogs", headers=alice).json()["items"]] == ["second", "first"]
+
+
+def test_rename_invalidates_cached_posts(client):
+    headers = register(client, "alice")
+    client.post("/blogs/create", json={"title": "post", "description": "d"}, headers=headers)
+    for _ in range(3):
+        assert client.get("/blogs/1", headers=headers).json()["author_name"] == "alice"
+
+    assert client.patch("/auth/update_me", json={"username": "alice2"}, headers=headers).status_code == 200
+    assert client.get("/blogs/1", headers=headers).json()["author_name"] == "alice2"
@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import database
+from database import ThreadedSession, async_session_scope
+from main import app
+from models import Users
+from tests.conftest import register
+
+
+@pytest.fixture(params=["true", "false"], ids=["async", "sync"])
+def mode_client(request, env):
+    env.setenv("DB_ASYNC", request.param)
+    database.Base.metadata.create_all(database.get_engine())
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("flag, session_type", [("true", AsyncSession), ("false", ThreadedSession)])
+@pytest.mark.anyio
+async def test_db_async_picks_the_session_type(env, flag, session_type):
+    env.setenv("DB_ASYNC", flag)
+    database.Base.metadata.create_all(database.get_engine())
+    try:
+        async with async_session_scope() as db:
+            assert isinstance(db, session_type)
+            db.add(Users(username="alice", email="a@example.com", password_hash="x", role="user"))
+            await db.commit()
+        async with async_session_scope(read_only=True) as db:
+            assert await db.scalar(select(Users.username)) == "alice"
+    finally:
+        await database.dispose_engines()
+
+
+def test_routes_behave_the_same_in_both_modes(mode_client):
+    headers = register(mode_client, "alice")
+    assert mode_client.get("/auth/me", headers=headers).json()["username"] == "alice"
+
+    created = mode_client.post("/blogs/create", json={"title": "hello", "description": "world"}, headers=headers)
+    assert created.status_code == 201
+    blog_id = created.json()["blog"]["id"]
+
+    assert mode_client.patch(f"/blogs/edit/{blog_id}", json={"title": "hello again"}, headers=headers).status_code == 200
+    assert mode_client.get(f"/blogs/{blog_id}", headers=headers).json()["title"] == "hello again"
+    assert [b["id"] for b in mode_client.get("/blogs/all_blogs", headers=headers).json()["items"]] == [blog_id]
+
+    duplicate = mode_client.post(
+        "/auth/register", json={"username": "alice", "email": "other@example.com", "password_hash": "secret123"}
+    )
+    assert duplicate.status_code == 400
@@ -0,0 +1,56 @@
+"""Settings are read when used, so changing them after import takes effect."""
+import shutil
+
+import pytest
+from sqlalchemy import select, update
+
+import database
+from models import Blogs
+from serve import worker_count
+from tests.conftest import register
+
+
+def test_replica_is_chosen_per_request(env, client, tmp_path):
+    env.setenv("RESPONSE_CACHE_BACKEND", "none")
+    headers = register(client, "alice")
+    client.post("/blogs/create", json={"title": "primary", "description": "d"}, headers=headers)
+
+    replica = tmp_path / "replica.db"
+    shutil.copy(tmp_path / "app.db", replica)
+    env.setenv("DB_READ_CONNECTION", f"sqlite:///{replica}")
+    env.setenv("DB_ASYNC_READ_CONNECTION", f"sqlite+aiosqlite:///{replica}")
+    # Module import chose nothing; the replica engines are simply built on first use.
+    for builder in (database.get_settings, database.get_read_engine, database.get_async_read_engine, database.session_factory):
+        builder.cache_clear()
+    with database.get_read_engine().begin() as conn:
+        conn.execute(update(Blogs).values(title="replica"))
+
+    assert client.get("/blogs/1", headers=headers).json()["title"] == "replica"
+    # Writes still go to the primary.
+    client.patch("/blogs/edit/1", json={"description": "edited"}, headers=headers)
+    with database.get_engine().connect() as conn:
+        row = conn.execute(select(Blogs.title, Blogs.description)).one()
+    assert tuple(row) == ("primary", "edited")
+
+
+def test_rate_limits_follow_the_current_settings(env, client):
+    env.setenv("RATE_LIMIT_ENABLED", "true")
+    database.get_settings.cache_clear()
+    register(client, "alice")
+
+    env.setenv("RATE_LIMIT_LOGIN_USER", "2/60")
+    database.get_settings.cache_clear()
+    codes = [client.post("/auth/token", data={"username": "alice", "password": "wrong"}).status_code for _ in range(3)]
+    assert codes == [401, 401, 429]
+
+
+def test_python_search_refuses_several_workers(env):
+    env.setenv("SEARCH_BACKEND", "python")
+    env.setenv("WEB_WORKERS", "4")
+    database.get_settings.cache_clear()
+    with pytest.raises(SystemExit, match="SEARCH_BACKEND=python"):
+        worker_count(database.get_settings())
+
+    env.setenv("WEB_WORKERS", "1")
+    database.get_settings.cache_clear()
+    assert worker_count(database.get_settings()) == 1